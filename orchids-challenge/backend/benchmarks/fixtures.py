@@ -0,0 +1,208 @@
+"""Local fixture sites served over HTTP so benchmarks never touch the real internet"""
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# A 1x1 transparent PNG, used for every fixture image
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat."
+)
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    # Wrap a body in a minimal but realistic document shell
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="description" content="{title} benchmark fixture">
+<title>{title}</title>
+{head}
+</head>
+<body>
+<header class="site-header"><nav><a href="/">Home</a><a href="/about">About</a></nav></header>
+{body}
+<footer class="site-footer"><p>Fixture footer for {title}</p></footer>
+</body>
+</html>"""
+
+
+def small_page() -> str:
+    """A landing page with a hero, a few cards and one image"""
+    body = """
+<main>
+  <section class="hero"><h1>Small fixture</h1><p>A tiny landing page.</p>
+    <button class="cta">Get started</button></section>
+  <section class="cards">
+    <article><h2>Fast</h2><p>Short copy.</p></article>
+    <article><h2>Simple</h2><p>Short copy.</p></article>
+    <article><h2>Offline</h2><p>Short copy.</p><img src="/img/0.png" alt="card"></article>
+  </section>
+</main>"""
+    head = "<style>body{font-family:Helvetica,sans-serif;color:#222;background:#fafafa}.hero{padding:4rem}</style>"
+    return _page("Small", body, head)
+
+
+def large_page(sections: int = 400, paragraphs: int = 20) -> str:
+    """A multi-megabyte document with thousands of nodes"""
+    parts = ["<main>"]
+    for i in range(sections):
+        paras = "".join(
+            f'<p class="copy copy-{j}">{LOREM} ({i}.{j})</p>' for j in range(paragraphs)
+        )
+        parts.append(
+            f'<section id="s{i}" class="block block-{i % 7}"><h2>Section {i}</h2>'
+            f'<div class="grid">{paras}</div><img src="/img/{i}.png" alt="figure {i}"></section>'
+        )
+    parts.append("</main>")
+    return _page("Large", "".join(parts))
+
+
+def css_heavy_page(sheets: int = 12) -> str:
+    """A page that pulls in many large external stylesheets and media queries"""
+    links = "\n".join(f'<link rel="stylesheet" href="/static/style-{i}.css">' for i in range(sheets))
+    body = "<main>" + "".join(
+        f'<div class="widget w{i}"><h3>Widget {i}</h3><p>{LOREM}</p></div>' for i in range(60)
+    ) + "</main>"
+    return _page("CSS heavy", body, links)
+
+
+def stylesheet(index: int, rules: int = 1500) -> str:
+    """A generated stylesheet with plain rules plus a couple of media blocks"""
+    lines = [
+        f".w{r % 60} .rule-{index}-{r} {{ color: #{(r * 2654435761) % 0xFFFFFF:06x}; "
+        f"margin: {r % 17}px; padding: {r % 11}px; }}"
+        for r in range(rules)
+    ]
+    lines.append(f"@media (max-width: 768px) {{ .widget {{ padding: {index}px; }} }}")
+    lines.append(f"@media (prefers-color-scheme: dark) {{ body {{ background: #1{index % 10}1; }} }}")
+    return "\n".join(lines)
+
+
+def lazy_page(images: int = 80) -> str:
+    """Images only load once they scroll into view"""
+    imgs = "".join(
+        f'<figure style="height:600px"><img class="lazy" data-src="/img/{i}.png" alt="lazy {i}">'
+        f"<figcaption>Lazy image {i}</figcaption></figure>"
+        for i in range(images)
+    )
+    script = """
+<script>
+const io = new IntersectionObserver((entries) => {
+  entries.forEach((entry) => {
+    if (entry.isIntersecting) {
+      entry.target.src = entry.target.dataset.src;
+      io.unobserve(entry.target);
+    }
+  });
+});
+document.querySelectorAll('img.lazy').forEach((img) => io.observe(img));
+</script>"""
+    return _page("Lazy loading", f"<main>{imgs}</main>{script}")
+
+
+def infinite_scroll_page(batches: int = 25, batch_size: int = 10) -> str:
+    """Content keeps appending as the page is scrolled (bounded so scraping can finish)"""
+    script = f"""
+<script>
+let loaded = 0;
+const feed = document.getElementById('feed');
+function loadBatch() {{
+  if (loaded >= {batches}) return;
+  for (let i = 0; i < {batch_size}; i++) {{
+    const item = document.createElement('article');
+    item.className = 'feed-item';
+    item.style.height = '240px';
+    item.innerHTML = '<h3>Item ' + (loaded * {batch_size} + i) + '</h3><p>{LOREM}</p>';
+    feed.appendChild(item);
+  }}
+  loaded++;
+}}
+loadBatch();
+window.addEventListener('scroll', () => {{
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 400) loadBatch();
+}});
+</script>"""
+    return _page("Infinite scroll", '<main id="feed"></main>' + script)
+
+
+# Fixture name -> page builder. Pages are rendered once at server start.
+FIXTURES: Dict[str, Callable[[], str]] = {
+    "small": small_page,
+    "large": large_page,
+    "css-heavy": css_heavy_page,
+    "lazy": lazy_page,
+    "infinite-scroll": infinite_scroll_page,
+}
+
+
+class FixtureServer:
+    """Serves the fixture corpus from a background thread on 127.0.0.1"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.pages = {name: builder().encode("utf-8") for name, builder in FIXTURES.items()}
+        self.stylesheets: Dict[int, bytes] = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, content_type = server.resolve(urlparse(self.path).path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "public, max-age=300")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep the benchmark output readable
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def resolve(self, path: str) -> Tuple[Optional[bytes], str]:
+        """Map a request path to (body, content type), or (None, '') when unknown"""
+        if path.startswith("/site/"):
+            page = self.pages.get(path[len("/site/"):].strip("/"))
+            return page, "text/html; charset=utf-8"
+        if path.startswith("/static/style-") and path.endswith(".css"):
+            try:
+                index = int(path[len("/static/style-"):-len(".css")])
+            except ValueError:
+                return None, ""
+            if index not in self.stylesheets:
+                self.stylesheets[index] = stylesheet(index).encode("utf-8")
+            return self.stylesheets[index], "text/css"
+        if path.startswith("/img/"):
+            return PIXEL_PNG, "image/png"
+        return None, ""
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, fixture: str) -> str:
+        return f"{self.base_url}/site/{fixture}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
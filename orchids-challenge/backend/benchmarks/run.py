@@ -0,0 +1,279 @@
+"""Drive /clone and /analyze against local fixture sites with a stubbed LLM
+
+Usage (from the backend directory):
+
+    python -m benchmarks.run --requests 20 --concurrency 4 --llm-latency-ms 300
+    python -m benchmarks.run --fixtures small large --endpoints clone --compare benchmarks/results/last.json
+
+The app runs in-process through httpx's ASGI transport, so the stub replaces
+LLMCloner._call_llm without touching any network. Chromium still renders the
+fixture pages for real, which is the part of a request we actually want to measure.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.fixtures import FIXTURES, FixtureServer
+from benchmarks.stub_llm import StubLLM
+from metrics import MemoryWatermark, percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+class StageTimer:
+    """Wraps pipeline functions on the main module and records how long each takes"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._originals: List[tuple] = []
+
+    def reset(self):
+        self.durations = defaultdict(list)
+
+    def _wrap_async(self, stage, func, stage_from_args=None):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                name = stage_from_args(args, kwargs) if stage_from_args else stage
+                self.durations[name].append((time.perf_counter() - start) * 1000)
+        return wrapper
+
+    def _wrap_sync(self, stage, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.durations[stage].append((time.perf_counter() - start) * 1000)
+        return wrapper
+
+    def patch(self, owner, attr, wrapped):
+        self._originals.append((owner, attr, owner.__dict__[attr]))
+        setattr(owner, attr, staticmethod(wrapped))
+
+    def install(self, main, llm):
+        """Instrument the scrape, extract and LLM stages and swap in the stub LLM"""
+        self.patch(main.WebScraper, "fetch_page_data",
+                   self._wrap_async("scrape", main.WebScraper.fetch_page_data))
+        self.patch(main.WebScraper, "extract_design_context",
+                   self._wrap_sync("extract", main.WebScraper.extract_design_context))
+        self.patch(main.LLMCloner, "clone_with_reasoning_chain",
+                   self._wrap_async("generate", main.LLMCloner.clone_with_reasoning_chain))
+
+        def llm_stage(args, kwargs):
+            task_type = kwargs.get("task_type", args[2] if len(args) > 2 else "unknown")
+            return f"llm.{task_type}"
+
+        self.patch(main.LLMCloner, "_call_llm", self._wrap_async("llm", llm, llm_stage))
+
+    def uninstall(self):
+        for owner, attr, original in reversed(self._originals):
+            setattr(owner, attr, original)
+        self._originals = []
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, values in sorted(self.durations.items()):
+            stats = summarize(values)
+            stats["total_ms"] = round(sum(values), 2)
+            result[stage] = stats
+        return result
+
+
+async def run_scenario(client: httpx.AsyncClient, endpoint: str, url: str, args,
+                       timer: StageTimer) -> Dict[str, Any]:
+    """Fire ``args.requests`` requests at ``endpoint`` with bounded concurrency"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = defaultdict(int)
+
+    async def one(i: int):
+        # A unique query string per request keeps every request cold unless --warm
+        target = url if args.warm else f"{url}?bench={i}"
+        payload = {"url": target, "model": args.model}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(f"/{endpoint}", json=payload)
+                if resp.status_code != 200:
+                    errors[str(resp.status_code)] += 1
+                    return
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    timer.reset()
+    async with MemoryWatermark(include_children=True) as sampler:
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - wall_start
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "completed": len(latencies),
+        "errors": dict(errors),
+        "wall_seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        "latency_ms": summarize(latencies),
+        "peak_rss_mb": round(sampler.peak_mb, 1),
+        "peak_children_rss_mb": round(sampler.peak_children_mb, 1),
+        "peak_total_rss_mb": round(sampler.peak_total_mb, 1),
+        "stages": timer.summary(),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return human-readable regression lines for scenarios present in both runs"""
+    regressions = []
+    previous = {s["name"]: s for s in baseline.get("scenarios", [])}
+    for scenario in current["scenarios"]:
+        before = previous.get(scenario["name"])
+        if not before:
+            continue
+        checks = [
+            ("p50", before["latency_ms"]["p50"], scenario["latency_ms"]["p50"], True),
+            ("p95", before["latency_ms"]["p95"], scenario["latency_ms"]["p95"], True),
+            ("rps", before["rps"], scenario["rps"], False),
+            ("peak_rss_mb", before["peak_rss_mb"], scenario["peak_rss_mb"], True),
+            # Older result files predate the child-process numbers
+            ("peak_total_rss_mb", before.get("peak_total_rss_mb"), scenario["peak_total_rss_mb"], True),
+        ]
+        for metric, old, new, lower_is_better in checks:
+            if not old:
+                continue
+            change = (new - old) / old * 100.0
+            print(f"  {scenario['name']:<28} {metric:<17} {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%)")
+            worse = change > threshold if lower_is_better else change < -threshold
+            if worse:
+                regressions.append(f"{scenario['name']} {metric} {change:+.1f}%")
+    return regressions
+
+
+async def main_async(args) -> Dict[str, Any]:
+    import main  # imported here so --help works without the app's dependencies
+
+    if not args.rate_limit:
+        # The app's scrape rate limit answers 429 past MAX_REQUESTS_PER_MINUTE,
+        # which would fail most of any run longer than a few seconds.
+        main.scrape_admission.bucket = None
+
+    llm = StubLLM(args.llm_latency_ms, args.llm_jitter_ms, args.seed)
+    timer = StageTimer()
+    timer.install(main, llm)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "scenarios": [],
+    }
+    try:
+        with FixtureServer() as server:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for fixture in args.fixtures:
+                    for endpoint in args.endpoints:
+                        name = f"{endpoint}/{fixture}"
+                        print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})")
+                        scenario = await run_scenario(client, endpoint, server.url_for(fixture), args, timer)
+                        scenario.update({"name": name, "endpoint": endpoint, "fixture": fixture})
+                        results["scenarios"].append(scenario)
+                        lat = scenario["latency_ms"]
+                        print(f"  p50 {lat['p50']}ms  p95 {lat['p95']}ms  p99 {lat['p99']}ms  "
+                              f"{scenario['rps']} req/s  peak RSS {scenario['peak_rss_mb']} MB "
+                              f"(+{scenario['peak_children_rss_mb']} MB in child processes)  "
+                              f"errors {scenario['errors'] or 0}")
+    finally:
+        timer.uninstall()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the Website Cloner API")
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES), choices=list(FIXTURES))
+    parser.add_argument("--endpoints", nargs="+", default=["clone", "analyze"], choices=["clone", "analyze"])
+    parser.add_argument("--requests", type=int, default=10, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--model", default="gpt-4o", help="model name passed through to the API")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm", action="store_true", help="reuse one URL so repeat requests hit the cache")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the app's scrape rate limit (MAX_REQUESTS_PER_MINUTE)")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(main_async(args))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"bench-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions beyond threshold:")
+            for line in regressions:
+                print(f"  {line}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,172 @@
+"""Measure how long a worker takes to import and to answer its first request
+
+Usage (from the backend directory):
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --modes cold warm --fixture large
+
+Every measurement runs in a fresh interpreter, so nothing is already imported
+or cached. "Import" times ``import main`` and lists the heaviest modules it
+pulled in (from ``python -X importtime``). "First request" starts the app's
+lifespan, waits for /ready, then times the first and second /analyze against
+a local fixture with the stub LLM. It runs once without warm-up (cold) and once
+with WARMUP_ON_STARTUP=1 (warm).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fixtures import FIXTURES
+from benchmarks.run import RESULTS_DIR, git_revision, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def run_python(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    # Callers look at returncode themselves, to report the child's stderr
+    return subprocess.run([sys.executable] + args, cwd=BACKEND_DIR, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})}, check=False)
+
+
+def measure_import(runs: int) -> Dict[str, Any]:
+    times = []
+    for _ in range(runs):
+        proc = run_python(["-c", IMPORT_SNIPPET])
+        if proc.returncode != 0:
+            raise RuntimeError(f"import main failed:\n{proc.stderr}")
+        times.append(float(proc.stdout.strip().splitlines()[-1]) * 1000)
+    return {"import_ms": summarize(times), "heaviest_modules": heaviest_imports()}
+
+
+def heaviest_imports(top: int = 10) -> List[Dict[str, Any]]:
+    """Packages imported directly by main, by cumulative import time (from -X importtime)"""
+    proc = run_python(["-X", "importtime", "-c", "import main"])
+    totals: Dict[str, int] = {}
+    children: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        package = name.strip().split(".")[0]
+        if depth == 1:
+            children[package] = children.get(package, 0) + int(cumulative)
+        elif depth == 0:
+            # Children are printed before their parent, so these belonged to this module
+            if name.strip() == "main":
+                totals = children
+            children = {}
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+async def first_requests(fixture: str, llm_latency_ms: float) -> Dict[str, Any]:
+    """Runs inside a child interpreter; see measure_first_request"""
+    import httpx
+
+    from benchmarks.fixtures import FixtureServer
+    from benchmarks.stub_llm import StubLLM
+
+    start = time.perf_counter()
+    import main
+    import_ms = (time.perf_counter() - start) * 1000
+
+    main.scrape_admission.bucket = None
+    main.LLMCloner._call_llm = staticmethod(StubLLM(llm_latency_ms, 0.0, 0))
+
+    result: Dict[str, Any] = {"import_ms": round(import_ms, 1)}
+    with FixtureServer() as server:
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                start = time.perf_counter()
+                while (await client.get("/ready")).status_code != 200:
+                    await asyncio.sleep(0.05)
+                result["ready_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                result["warmup"] = (await client.get("/ready")).json()
+
+                for label in ("first_request_ms", "second_request_ms"):
+                    # A different query string each time so the second request isn't a cache hit
+                    url = f"{server.url_for(fixture)}?startup={label}"
+                    start = time.perf_counter()
+                    resp = await client.post("/analyze", json={"url": url, "model": "gpt-4o"})
+                    result[label] = round((time.perf_counter() - start) * 1000, 1)
+                    if resp.status_code != 200:
+                        result.setdefault("errors", []).append(f"{label}: HTTP {resp.status_code} {resp.text[:200]}")
+    return result
+
+
+def measure_first_request(mode: str, fixture: str, llm_latency_ms: float) -> Dict[str, Any]:
+    env = {"WARMUP_ON_STARTUP": "1" if mode == "warm" else "0"}
+    proc = run_python(["-m", "benchmarks.startup", "--child", "--fixture", fixture,
+                       "--llm-latency-ms", str(llm_latency_ms)], env=env)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time and first-request benchmark for the Website Cloner API")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time the import in")
+    parser.add_argument("--modes", nargs="+", default=["cold", "warm"], choices=["cold", "warm"])
+    parser.add_argument("--fixture", default="small", choices=list(FIXTURES))
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(asyncio.run(first_requests(args.fixture, args.llm_latency_ms))))
+        return 0
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "args": vars(args),
+        },
+    }
+    print(f"Timing `import main` in {args.runs} fresh interpreters")
+    results["import"] = measure_import(args.runs)
+    lat = results["import"]["import_ms"]
+    print(f"  p50 {lat['p50']}ms  max {lat['max']}ms")
+    for entry in results["import"]["heaviest_modules"]:
+        print(f"    {entry['module']:<24} {entry['cumulative_ms']:>8.1f}ms")
+
+    results["first_request"] = {}
+    for mode in args.modes:
+        print(f"First requests ({mode} start, fixture {args.fixture})")
+        outcome = measure_first_request(mode, args.fixture, args.llm_latency_ms)
+        results["first_request"][mode] = outcome
+        if "error" in outcome:
+            print(f"  failed: {outcome['error']}")
+        else:
+            print(f"  ready after {outcome['ready_ms']}ms  first {outcome['first_request_ms']}ms  "
+                  f"second {outcome['second_request_ms']}ms  errors {len(outcome.get('errors', []))}")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"startup-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,47 @@
+"""Deterministic stand-in for LLMCloner._call_llm with configurable latency"""
+import asyncio
+import hashlib
+import random
+from typing import Dict
+
+# Canned responses per task type. The HTML one is a complete document so that
+# LLMCloner._clean_html_response exercises the same code path as a real reply.
+CANNED_RESPONSES: Dict[str, str] = {
+    "overview": "A clean, content-first layout with a clear hero and consistent typography.",
+    "analysis": "1. Minimal aesthetic\n2. Clear hierarchy\n3. Neutral palette\n4. Sans-serif type",
+    "content": "Hero: Build faster.\nCards: Reliable, Simple, Offline.",
+    "style": ":root { --primary: #222; --background: #fafafa; }",
+    "html": """<!DOCTYPE html>
+<html lang="en">
+<head><title>Stub clone</title><style>body{font-family:sans-serif}</style></head>
+<body><header><nav><a href="/">Home</a></nav></header>
+<main><section><h1>Stub clone</h1><p>Generated offline.</p><button>Go</button>
+<img src="https://example.com/a.png"></section></main>
+<footer><p>Footer</p></footer></body>
+</html>""",
+}
+
+
+class StubLLM:
+    """Async callable with the same signature as LLMCloner._call_llm
+
+    Latency is ``latency_ms`` plus uniform jitter in ``[0, jitter_ms]``. The jitter
+    is seeded from the prompt so repeated runs over the same corpus sleep for the
+    same amounts and results stay comparable between runs.
+    """
+
+    def __init__(self, latency_ms: float = 200.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.calls = 0
+
+    def _delay(self, prompt: str) -> float:
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        jitter = random.Random(digest).uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000.0
+
+    async def __call__(self, prompt: str, model: str, task_type: str, *args, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self._delay(prompt))
+        return CANNED_RESPONSES.get(task_type, CANNED_RESPONSES["analysis"])
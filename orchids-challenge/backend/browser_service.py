@@ -0,0 +1,446 @@
+"""Shared browser service: one local process owning a bounded pool of Chromium instances
+
+Run it on the same host as a multi-worker API:
+
+    python browser_service.py
+    BROWSER_SERVICE_URL=http://127.0.0.1:9400 uvicorn main:app --workers 4
+
+Each Chromium listens for CDP on a loopback port. API workers lease a slot
+(POST /leases), connect to the leased browser with Playwright's
+connect_over_cdp, scrape in a context of their own and release the slot
+(DELETE /leases/{id}). Waiting leases are granted round-robin across workers,
+so one busy worker can't starve the others. A monitor restarts browsers that
+crash or stop answering and reclaims leases that were never released.
+GET /status reports utilization.
+"""
+import asyncio
+import logging
+import math
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from metrics import percentile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("browser_service")
+
+load_dotenv()
+
+# Browser service settings (override from the environment)
+SERVICE_HOST = os.getenv("BROWSER_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("BROWSER_SERVICE_PORT", "9400"))
+BROWSER_COUNT = int(os.getenv("BROWSER_SERVICE_BROWSERS", "2"))
+CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_SERVICE_CONTEXTS_PER_BROWSER", "4"))
+CDP_BASE_PORT = int(os.getenv("BROWSER_SERVICE_CDP_BASE_PORT", "9500"))  # browser i listens on base + i
+CHROMIUM_PATH = os.getenv("BROWSER_SERVICE_CHROMIUM")  # defaults to Playwright's bundled Chromium
+LEASE_TTL = float(os.getenv("BROWSER_SERVICE_LEASE_TTL", "180"))  # seconds before an unreleased lease is reclaimed
+LEASE_MAX_WAIT = float(os.getenv("BROWSER_SERVICE_MAX_WAIT", "120"))  # seconds a lease request may queue
+LEASE_QUEUE_SIZE = int(os.getenv("BROWSER_SERVICE_QUEUE_SIZE", "64"))  # waiting leases before 429
+HEALTH_INTERVAL = float(os.getenv("BROWSER_SERVICE_HEALTH_INTERVAL", "2"))  # seconds between health checks
+HEALTH_FAILURES = int(os.getenv("BROWSER_SERVICE_HEALTH_FAILURES", "3"))  # missed checks before a live browser is restarted
+CHROMIUM_SANDBOX = os.getenv("BROWSER_SERVICE_CHROMIUM_SANDBOX", "false").lower() in ("1", "true", "yes")  # off, like Playwright
+STARTUP_TIMEOUT = 20.0  # seconds for a new Chromium to open its CDP port
+
+# The switches Playwright's chromium.launch() adds, so pooled browsers render and
+# throttle like the in-process one (background tabs, hover media queries, colors...)
+PLAYWRIGHT_CHROMIUM_ARGS = [
+    "--disable-field-trial-config",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-back-forward-cache",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-component-update",
+    "--no-default-browser-check",
+    "--disable-default-apps",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-features=ImprovedCookieControls,LazyFrameLoading,GlobalMediaControls,DestroyProfileOnBrowserClose,"
+    "MediaRouter,DialMediaRouteProvider,AcceptCHFrame,AutoExpandDetailsElement,"
+    "CertificateTransparencyComponentUpdater,AvoidUnnecessaryBeforeUnloadCheckSync,Translate,HttpsUpgrades,"
+    "PaintHolding,ThirdPartyStoragePartitioning,LensOverlay,PlzDedicatedWorker",
+    "--allow-pre-commit-input",
+    "--disable-hang-monitor",
+    "--disable-ipc-flooding-protection",
+    "--disable-popup-blocking",
+    "--disable-prompt-on-repost",
+    "--disable-renderer-backgrounding",
+    "--force-color-profile=srgb",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--enable-automation",
+    "--password-store=basic",
+    "--use-mock-keychain",
+    "--no-service-autorun",
+    "--export-tagged-pdf",
+    "--disable-search-engine-choice-screen",
+    "--unsafely-disable-devtools-self-xss-warnings",
+    "--enable-unsafe-swiftshader",
+    # Headless-only switches
+    "--headless",
+    "--hide-scrollbars",
+    "--mute-audio",
+    "--blink-settings=primaryHoverType=2,availableHoverTypes=2,primaryPointerType=4,availablePointerTypes=4",
+]
+
+
+class ChromiumProcess:
+    """One headless Chromium with a CDP endpoint on a fixed loopback port"""
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.user_data_dir: Optional[str] = None
+        self.leases: set = set()
+        self.restarts = 0
+        self.failed_checks = 0
+        self.started_at: Optional[float] = None
+        self.ready = False
+
+    @property
+    def cdp_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def alive(self) -> bool:
+        return self.ready and self.process is not None and self.process.returncode is None
+
+    def args(self, sandbox: bool = CHROMIUM_SANDBOX) -> list:
+        """Command-line switches: Playwright's defaults plus this browser's CDP port and profile"""
+        args = list(PLAYWRIGHT_CHROMIUM_ARGS)
+        if not sandbox:
+            # Containers usually can't provide the namespaces the sandbox needs
+            args.append("--no-sandbox")
+        return args + [
+            f"--remote-debugging-port={self.port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={self.user_data_dir}",
+            "about:blank",
+        ]
+
+    async def start(self, executable: str, client: httpx.AsyncClient):
+        self.user_data_dir = tempfile.mkdtemp(prefix=f"browser-service-{self.index}-")
+        self.process = await asyncio.create_subprocess_exec(
+            executable,
+            *self.args(),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.returncode is not None:
+                break
+            if await self.responding(client):
+                self.ready = True
+                self.started_at = time.time()
+                logger.info(f"Browser {self.index} up on port {self.port} (pid {self.process.pid})")
+                return
+            await asyncio.sleep(0.1)
+        await self.stop()
+        raise RuntimeError(f"Browser {self.index} did not open its CDP port {self.port}")
+
+    async def responding(self, client: httpx.AsyncClient) -> bool:
+        try:
+            resp = await client.get(f"{self.cdp_url}/json/version", timeout=2.0)
+            return resp.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def stop(self):
+        self.ready = False
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "cdp_url": self.cdp_url,
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.alive,
+            "leases": len(self.leases),
+            "capacity": CONTEXTS_PER_BROWSER,
+            "restarts": self.restarts,
+            "uptime_s": round(time.time() - self.started_at, 1) if self.alive and self.started_at else None,
+        }
+
+
+class BrowserPool:
+    """Hands out browser slots, fairly across workers, and keeps the browsers alive
+
+    Each browser takes up to ``per_browser`` leases and new leases go to the
+    least-loaded live browser. When nothing is free, requests wait in one FIFO
+    per worker and freed slots go to those queues in round-robin order.
+    """
+
+    def __init__(self, count: int, per_browser: int):
+        self.browsers = [ChromiumProcess(i, CDP_BASE_PORT + i) for i in range(count)]
+        self.per_browser = per_browser
+        self.leases: Dict[str, Dict[str, Any]] = {}
+        self._queues: Dict[str, deque] = {}  # worker -> futures waiting for a lease
+        self._rotation: deque = deque()      # workers with waiters, next to be served first
+        self._waiting = 0
+        self._executable: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.granted = 0
+        self.released = 0
+        self.reclaimed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_times = deque(maxlen=500)  # seconds
+
+    @property
+    def capacity(self) -> int:
+        return sum(self.per_browser for b in self.browsers if b.alive)
+
+    async def start(self):
+        self._client = httpx.AsyncClient()
+        self._executable = CHROMIUM_PATH
+        if not self._executable:
+            from playwright.async_api import async_playwright
+
+            async with async_playwright() as p:
+                self._executable = p.chromium.executable_path
+        for browser in self.browsers:
+            try:
+                await browser.start(self._executable, self._client)
+            except Exception as e:
+                # The monitor keeps trying; the service runs with whatever came up
+                logger.error(f"Could not start browser {browser.index}: {e}")
+
+    async def stop(self):
+        for browser in self.browsers:
+            await browser.stop()
+        if self._client is not None:
+            await self._client.aclose()
+
+    def _free_browser(self) -> Optional[ChromiumProcess]:
+        candidates = [b for b in self.browsers if b.alive and len(b.leases) < self.per_browser]
+        return min(candidates, key=lambda b: len(b.leases)) if candidates else None
+
+    def _grant(self, worker: str, browser: ChromiumProcess) -> Dict[str, Any]:
+        lease_id = uuid.uuid4().hex
+        lease = {
+            "id": lease_id,
+            "worker": worker,
+            "browser": browser.index,
+            "cdp_url": browser.cdp_url,
+            "granted_at": time.time(),
+            "expires_at": time.time() + LEASE_TTL,
+        }
+        self.leases[lease_id] = lease
+        browser.leases.add(lease_id)
+        self.granted += 1
+        return lease
+
+    def _dispatch(self):
+        # Serve waiting workers round-robin while there are free slots
+        while self._rotation:
+            browser = self._free_browser()
+            if browser is None:
+                return
+            worker = self._rotation.popleft()
+            queue = self._queues[worker]
+            future = queue.popleft()
+            self._waiting -= 1
+            future.set_result(self._grant(worker, browser))
+            if queue:
+                self._rotation.append(worker)
+            else:
+                del self._queues[worker]
+
+    def _abandon(self, worker: str, future: asyncio.Future) -> bool:
+        """Drop a waiter; returns False if it was granted a lease in the meantime"""
+        if future.done():
+            return False
+        future.cancel()
+        queue = self._queues.get(worker)
+        if queue is not None:
+            queue.remove(future)
+            self._waiting -= 1
+            if not queue:
+                del self._queues[worker]
+                self._rotation.remove(worker)
+        return True
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(10.0 * (self._waiting + 1) / max(1, self.capacity)))
+
+    async def acquire(self, worker: str, max_wait: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        browser = self._free_browser() if not self._rotation else None
+        if browser is not None:
+            lease = self._grant(worker, browser)
+        else:
+            if self._waiting >= LEASE_QUEUE_SIZE:
+                self.rejected += 1
+                raise HTTPException(status_code=429, detail="Browser service queue is full",
+                                    headers={"Retry-After": str(self.retry_after())})
+            future = asyncio.get_running_loop().create_future()
+            if worker not in self._queues:
+                self._queues[worker] = deque()
+                self._rotation.append(worker)
+            self._queues[worker].append(future)
+            self._waiting += 1
+            try:
+                done, _ = await asyncio.wait({future}, timeout=max_wait)
+            except asyncio.CancelledError:
+                if not self._abandon(worker, future):
+                    self.release(future.result()["id"])
+                raise
+            if not done and self._abandon(worker, future):
+                self.timed_out += 1
+                raise HTTPException(status_code=429, detail="Timed out waiting for a browser",
+                                    headers={"Retry-After": str(self.retry_after())})
+            lease = future.result()
+        self.wait_times.append(time.perf_counter() - start)
+        return lease
+
+    def release(self, lease_id: str) -> bool:
+        lease = self.leases.pop(lease_id, None)
+        if lease is None:
+            return False
+        self.browsers[lease["browser"]].leases.discard(lease_id)
+        self.released += 1
+        self._dispatch()
+        return True
+
+    async def monitor(self):
+        """Run check() every HEALTH_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            await self.check()
+
+    async def check(self):
+        """Reclaim expired leases and restart browsers that died or stopped answering"""
+        now = time.time()
+        for lease_id in [l["id"] for l in self.leases.values() if l["expires_at"] < now]:
+            logger.warning(f"Reclaiming lease {lease_id} from {self.leases[lease_id]['worker']}: never released")
+            self.reclaimed += 1
+            self.release(lease_id)
+        for browser in self.browsers:
+            if browser.alive and await browser.responding(self._client):
+                browser.failed_checks = 0
+                continue
+            browser.failed_checks += 1
+            if browser.alive and browser.failed_checks < HEALTH_FAILURES:
+                # Still running, just slow to answer; give it a few more checks
+                continue
+            logger.warning(f"Browser {browser.index} is down, restarting")
+            browser.failed_checks = 0
+            # Leases on a dead browser are worthless; their workers will retry and lease again
+            for lease_id in list(browser.leases):
+                self.leases.pop(lease_id, None)
+            browser.leases.clear()
+            await browser.stop()
+            try:
+                await browser.start(self._executable, self._client)
+                browser.restarts += 1
+            except Exception as e:
+                logger.error(f"Restart of browser {browser.index} failed: {e}")
+        self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        capacity = self.capacity
+        in_use = sum(len(b.leases) for b in self.browsers if b.alive)
+        return {
+            "capacity": capacity,
+            "leased": in_use,
+            "utilization": round(in_use / capacity, 3) if capacity else None,
+            "waiting": self._waiting,
+            "waiting_by_worker": {worker: len(queue) for worker, queue in self._queues.items()},
+            "leases_by_worker": self._leases_by_worker(),
+            "granted": self.granted,
+            "released": self.released,
+            "reclaimed": self.reclaimed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": round(percentile(self.wait_times, 50) * 1000, 1),
+            "wait_ms_p95": round(percentile(self.wait_times, 95) * 1000, 1),
+            "browsers": [b.snapshot() for b in self.browsers],
+        }
+
+    def _leases_by_worker(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for lease in self.leases.values():
+            counts[lease["worker"]] = counts.get(lease["worker"], 0) + 1
+        return counts
+
+
+pool = BrowserPool(BROWSER_COUNT, CONTEXTS_PER_BROWSER)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pool.start()
+    monitor = asyncio.create_task(pool.monitor())
+    try:
+        yield
+    finally:
+        monitor.cancel()
+        try:
+            await monitor
+        except asyncio.CancelledError:
+            pass
+        await pool.stop()
+
+
+app = FastAPI(title="Browser Service", description="Shared Chromium pool for API workers", lifespan=lifespan)
+
+
+class LeaseRequest(BaseModel):
+    worker: str  # any stable id for the calling process; used for fair scheduling
+    max_wait: Optional[float] = None  # seconds, capped at BROWSER_SERVICE_MAX_WAIT
+
+
+@app.post("/leases")
+async def create_lease(request: LeaseRequest):
+    """Wait for a browser slot; returns the lease id and the CDP URL to connect to"""
+    max_wait = min(request.max_wait or LEASE_MAX_WAIT, LEASE_MAX_WAIT)
+    lease = await pool.acquire(request.worker, max_wait)
+    return {
+        "id": lease["id"],
+        "cdp_url": lease["cdp_url"],
+        "browser": lease["browser"],
+        "expires_in": round(lease["expires_at"] - time.time(), 1),
+    }
+
+
+@app.delete("/leases/{lease_id}")
+async def release_lease(lease_id: str):
+    """Give a slot back (after closing the context opened in it)"""
+    return {"released": pool.release(lease_id)}
+
+
+@app.get("/status")
+async def status():
+    """Utilization, queueing and per-browser health"""
+    return pool.snapshot()
+
+
+if __name__ == "__main__":
+    import uvicorn  # type: ignore
+    # One process on purpose: the pool's state lives in memory
+    uvicorn.run(app, host=SERVICE_HOST, port=SERVICE_PORT, workers=1)
@@ -1,22 +1,45 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, HttpUrl
-from fastapi.middleware.cors import CORSMiddleware
-from bs4 import BeautifulSoup
-import httpx
-import os
+import asyncio
+import base64
+import gzip
+import hashlib
+import heapq
+import importlib
+import io
+import itertools
 import json
-from typing import Dict, List, Optional, Any
-from dotenv import load_dotenv
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import logging
-import asyncio
-from ratelimit import limits, sleep_and_retry
+import math
+import mimetypes
+import os
+import random
+import re
+import shutil
+import socket
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from html import escape as html_escape
+from typing import Any, Dict, List, Literal, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpx
 from cachetools import TTLCache
-from fastapi.responses import Response
-from urllib.parse import urlparse
-import openai
-import google.generativeai as genai
-import base64
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, HttpUrl
+
+import snapshots
+from metrics import MemoryWatermark, percentile
+
+try:
+    import orjson  # optional: several times faster than json for large cached responses
+except ImportError:
+    orjson = None
 
 # Set up logging so we can see what's happening in the console
 logging.basicConfig(level=logging.INFO)
@@ -24,11 +47,30 @@ logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+# The provider SDKs, Playwright and BeautifulSoup are imported where they're first
+# used, so importing this module (and so starting a worker) stays quick.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Kick off the (optional) warm-up in the background; release shared clients on shutdown"""
+    warmup.start()
+    try:
+        yield
+    finally:
+        await warmup.stop()
+        if CACHE_PERSIST_PATH:
+            try:
+                saved = await asyncio.to_thread(save_persisted_cache, CACHE_PERSIST_PATH, persisted_cache_entries())
+                logger.info(f"Saved {saved} cached responses to {CACHE_PERSIST_PATH}")
+            except Exception as e:
+                logger.warning(f"Could not save the response cache: {e}")
+        await close_llm_providers()
+        await close_proxy_client()
+        await browser_manager.aclose()
 
 # Initialize FastAPI app
-app = FastAPI(title="Website Cloner API", description="AI-powered website cloning system")
+app = FastAPI(title="Website Cloner API", description="AI-powered website cloning system", lifespan=lifespan)
 
 # Allow requests from the frontend (localhost:3000)
 app.add_middleware(
@@ -37,20 +79,340 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Location"],  # so the frontend can revalidate via /results
 )
 
 # Set up a simple in-memory cache (good enough for this demo)
 cache = TTLCache(maxsize=100, ttl=3600)  # Cache for 1 hour
+# The same cached responses by result id (their ETag), for conditional GETs on /results/{id}
+cached_results = TTLCache(maxsize=cache.maxsize, ttl=cache.ttl)
+
+# Cached response encoding (override from the environment)
+RESPONSE_COMPRESSION = [e.strip() for e in os.getenv("RESPONSE_COMPRESSION", "br,gzip").split(",") if e.strip()]
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+def encode_json(payload: Any) -> bytes:
+    """Compact UTF-8 JSON, byte-for-byte what FastAPI's JSONResponse would send"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class CachedResponse:
+    """A JSON response encoded once, with its ETags and pre-compressed variants
+
+    Cache hits are written out as these bytes directly instead of going back
+    through FastAPI's validation and JSON encoding on every request. Each one
+    is also reachable at ``/results/{result_id}``, where a GET with
+    If-None-Match can be answered with 304. Each content-coding is a different
+    byte sequence, so each gets its own strong ETag (``"<id>-gzip"``...).
+    """
+
+    __slots__ = ("body", "result_id", "etag", "variants")
 
-# Rate limiting to avoid hammering the backend or getting blocked by sites
+    def __init__(self, body: bytes):
+        self.body = body
+        self.result_id = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{self.result_id}"'
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+            for encoding in RESPONSE_COMPRESSION:
+                compressed = self._compress(body, encoding)
+                if compressed is not None and len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    @staticmethod
+    def _compress(body: bytes, encoding: str) -> Optional[bytes]:
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=6, mtime=0)
+        if encoding == "br":
+            try:
+                import brotli
+            except ImportError:
+                return None
+            # Quality 5 compresses about as well as gzip -9 at a fraction of brotli's max-quality cost
+            return brotli.compress(body, quality=5)
+        return None
+
+    @classmethod
+    def build(cls, payload: Any) -> "CachedResponse":
+        # Encoding and compressing multi-megabyte results is CPU-bound: call from a thread
+        return cls(encode_json(payload))
+
+    @staticmethod
+    def _accepted(header: str) -> Dict[str, float]:
+        accepted = {}
+        for part in header.split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            if name:
+                accepted[name.strip().lower()] = q
+        return accepted
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return f'"{self.result_id}-{encoding}"' if encoding else self.etag
+
+    def _select_encoding(self, request: Request) -> Optional[str]:
+        accepted = self._accepted(request.headers.get("accept-encoding", ""))
+        for encoding in RESPONSE_COMPRESSION:
+            if encoding in self.variants and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return None
+
+    def respond(self, request: Request, conditional: bool = False) -> Response:
+        """The best encoding the client accepts; with ``conditional``, 304 if it already has these bytes
+
+        Only GET/HEAD may answer If-None-Match with 304, so POST endpoints
+        leave ``conditional`` off and point at the GET route instead.
+        """
+        encoding = self._select_encoding(request)
+        etag = self.etag_for(encoding)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding",
+                   "Content-Location": f"/results/{self.result_id}"}
+        if_none_match = request.headers.get("if-none-match", "") if conditional else ""
+        if if_none_match:
+            # Weak comparison, as If-None-Match requires, against the representation we'd send
+            tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+            if "*" in tags or etag in tags:
+                return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.variants[encoding], media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+def cache_response(key: str, cached: CachedResponse):
+    cache[key] = cached
+    cached_results[cached.result_id] = cached
+
+# Where to keep the response cache across restarts (unset = memory only)
+CACHE_PERSIST_PATH = os.getenv("CACHE_PERSIST_PATH")
+
+def persisted_cache_entries() -> List[List[Any]]:
+    """The live cache entries as [key, body] pairs; call on the event loop (TTLCache isn't thread-safe)"""
+    cache.expire()
+    return [[key, value.body] for key, value in cache.items()]
+
+def save_persisted_cache(path: str, entries: List[List[Any]]) -> int:
+    """Write entries from persisted_cache_entries() to disk; returns how many were saved"""
+    entries = [[key, body.decode("utf-8")] for key, body in entries]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"saved_at": time.time(), "ttl": cache.ttl, "entries": entries}, f)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+def load_persisted_cache(path: str) -> List[tuple]:
+    """Read and decode a previous save into (key, CachedResponse) pairs
+
+    Runs in a thread, so it only builds the responses; restore_persisted_cache
+    inserts them on the event loop. Per-entry expiry isn't saved, so a file
+    older than the cache TTL is ignored entirely and loaded entries start a
+    fresh TTL.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        data = json.load(f)
+    if time.time() - data.get("saved_at", 0) >= cache.ttl:
+        return []
+    # Bodies are stored as encoded JSON text (older saves held the response dicts)
+    return [(key, CachedResponse.build(value) if isinstance(value, dict) else CachedResponse(value.encode("utf-8")))
+            for key, value in data.get("entries", [])]
+
+async def restore_persisted_cache(path: str) -> int:
+    """Refill the cache from a previous save; returns how many entries were loaded"""
+    entries = await asyncio.to_thread(load_persisted_cache, path)
+    for key, cached in entries:
+        cache_response(key, cached)
+    return len(entries)
+
+# Rate limiting to avoid hammering the backend or getting blocked by sites (override from the environment)
 ONE_MINUTE = 60
-MAX_REQUESTS_PER_MINUTE = 30
+MAX_REQUESTS_PER_MINUTE = int(os.getenv("MAX_REQUESTS_PER_MINUTE", "30"))  # scrapes started, 0 = unlimited
+
+class TokenBucket:
+    """Allows ``rate`` events per ``period`` seconds on average, in bursts of up to ``rate``
+
+    Never sleeps: take() either spends a token or says how long until one is
+    free, so callers can turn an empty bucket into a fast 429.
+    """
+
+    def __init__(self, rate: int, period: float):
+        self.capacity = float(rate)
+        self.refill_per_second = rate / period
+        self.tokens = float(rate)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def take(self) -> float:
+        """Spend a token and return 0.0, or return the seconds until one is available"""
+        self._refill()
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.refill_per_second
+
+# Hard caps so one huge page can't take a worker down (override from the environment)
+MAX_HTML_CHARS = int(os.getenv("MAX_HTML_CHARS", str(2 * 1024 * 1024)))
+MAX_DOM_NODES = int(os.getenv("MAX_DOM_NODES", "20000"))
+MAX_STYLESHEET_BYTES = int(os.getenv("MAX_STYLESHEET_BYTES", str(512 * 1024)))  # per stylesheet
+MAX_TOTAL_CSS_BYTES = int(os.getenv("MAX_TOTAL_CSS_BYTES", str(2 * 1024 * 1024)))
+MAX_PAGE_HEIGHT = int(os.getenv("MAX_PAGE_HEIGHT", "30000"))  # pixels scrolled and captured
+MAX_COLLECTED_ITEMS = int(os.getenv("MAX_COLLECTED_ITEMS", "2000"))  # assets, inline styles, media queries...
+
+async def track_memory():
+    """Dependency that samples RSS for the lifetime of a request"""
+    async with MemoryWatermark() as memory:
+        yield memory
 
-@sleep_and_retry
-@limits(calls=MAX_REQUESTS_PER_MINUTE, period=ONE_MINUTE)
-def rate_limit():
-    # This function is just a decorator for rate limiting
-    pass
+# Admission control settings (override from the environment)
+MAX_CONCURRENT_SCRAPES = int(os.getenv("MAX_CONCURRENT_SCRAPES", "2"))  # Chromium instances at once
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "16"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))  # waiters per resource before 429
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "120"))  # seconds queued before 429
+
+# Queue priorities: lower is served first
+PRIORITY_ANALYZE = 0
+PRIORITY_CLONE = 1
+
+# Priority of the request being handled, so LLM calls deep in the pipeline queue correctly
+request_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITY_CLONE)
+
+class AdmissionRejected(HTTPException):
+    """Raised when a resource's wait queue is full, the wait took too long or its rate limit is spent"""
+
+    def __init__(self, resource: str, retry_after: int, reason: str = "too many requests waiting for"):
+        super().__init__(
+            status_code=429,
+            detail=f"Server busy: {reason} {resource}, retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class AdmissionController:
+    """Bounded concurrency for one resource, with a bounded priority wait queue
+
+    Up to ``capacity`` holders run at once. Others wait in priority order (FIFO
+    within a priority); once ``queue_size`` are waiting, new arrivals are
+    rejected straight away with 429 and a Retry-After estimate. With a
+    ``bucket``, arrivals also spend a token from it, and are rejected the same
+    way (Retry-After being the time until the next token) when it's empty.
+    """
+
+    def __init__(self, name: str, capacity: int, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 max_wait: float = ADMISSION_MAX_WAIT, bucket: Optional[TokenBucket] = None):
+        self.name = name
+        self.bucket = bucket
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._active = 0
+        self._waiters: List[list] = []  # heap of [priority, sequence, future]
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+        self.wait_times = deque(maxlen=500)     # seconds
+        self.service_times = deque(maxlen=500)  # seconds
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def has_free_slot(self) -> bool:
+        """Whether an acquire right now would be admitted without queueing"""
+        return self._active < self.capacity and not self._waiters
+
+    def retry_after(self) -> int:
+        # Rough time for the queue ahead of a new arrival to drain
+        service = (sum(self.service_times) / len(self.service_times)) if self.service_times else 10.0
+        return max(1, math.ceil(service * (self.queue_depth + 1) / self.capacity))
+
+    async def acquire(self, priority: int):
+        start = time.perf_counter()
+        immediate = self._active < self.capacity and not self._waiters
+        if not immediate and len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.retry_after())
+        if self.bucket is not None:
+            wait = self.bucket.take()
+            if wait > 0:
+                self.rate_limited += 1
+                raise AdmissionRejected(self.name, max(1, math.ceil(wait)), "rate limit reached for")
+        if immediate:
+            self._active += 1
+        else:
+            entry = [priority, next(self._sequence), asyncio.get_running_loop().create_future()]
+            heapq.heappush(self._waiters, entry)
+            try:
+                done, _ = await asyncio.wait({entry[2]}, timeout=self.max_wait)
+            except asyncio.CancelledError:
+                if not self._abandon(entry):
+                    # release() already handed us the slot; pass it on or it's lost for good
+                    self.release()
+                raise
+            if not done and self._abandon(entry):
+                self.timed_out += 1
+                raise AdmissionRejected(self.name, self.retry_after())
+        self.admitted += 1
+        self.wait_times.append(time.perf_counter() - start)
+
+    def _abandon(self, entry: list) -> bool:
+        """Drop a waiter; returns False if it was granted a slot in the meantime (and so keeps it)"""
+        if entry[2].cancel():
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            return True
+        return False
+
+    def release(self):
+        # Hand the slot straight to the next waiter, if any, instead of freeing it
+        if self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+        else:
+            self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        await self.acquire(request_priority.get() if priority is None else priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_times.append(time.perf_counter() - start)
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": round(percentile(self.wait_times, 50) * 1000, 1),
+            "wait_ms_p95": round(percentile(self.wait_times, 95) * 1000, 1),
+            "retry_after_s": self.retry_after(),
+        }
+
+scrape_admission = AdmissionController(
+    "browser", MAX_CONCURRENT_SCRAPES,
+    bucket=TokenBucket(MAX_REQUESTS_PER_MINUTE, ONE_MINUTE) if MAX_REQUESTS_PER_MINUTE > 0 else None
+)
+llm_admission = AdmissionController("LLM", MAX_CONCURRENT_LLM_CALLS)
 
 # Request model for the /clone and /analyze endpoints
 class CloneRequest(BaseModel):
@@ -58,6 +420,18 @@ class CloneRequest(BaseModel):
     model: Optional[str] = "gpt-4o"
     include_images: Optional[bool] = True
     include_styles: Optional[bool] = True
+    mirror_assets: Optional[bool] = False  # serve images/fonts/CSS from our own /assets store
+    generation_mode: Optional[Literal["single", "sections"]] = "single"  # "sections" generates blocks in parallel
+    auto_route: Optional[bool] = True  # run cheap steps on a fast model tier and hedge slow calls
+    save_snapshot: Optional[bool] = False  # keep the scraped page data for offline replays (see snapshots.py)
+
+# Request model for re-running extraction/cloning over saved snapshots
+class ReplayRequest(BaseModel):
+    snapshot_ids: Optional[List[str]] = None  # default: every saved snapshot
+    mode: Optional[Literal["extract", "clone"]] = "extract"
+    model: Optional[str] = "mock"  # mock keeps replays offline and reproducible
+    generation_mode: Optional[Literal["single", "sections"]] = "single"
+    processes: Optional[int] = None
 
 # This class holds all the design context we extract from a website
 class DesignContext(BaseModel):
@@ -79,45 +453,380 @@ class DesignContext(BaseModel):
     media_queries: List[Dict[str, Any]]
     embedded_styles: List[str]
     inline_styles: List[Dict[str, str]]
+    limits_hit: List[str] = []  # which size caps truncated this context
+    page_stats: Dict[str, Any] = {}
+    screenshot_tiles: Optional[Dict[str, Any]] = None  # tile set manifest when SCREENSHOT_MODE=tiles
+
+# Shared browser service (browser_service.py); unset = each worker runs its own Chromium
+BROWSER_SERVICE_URL = os.getenv("BROWSER_SERVICE_URL")
+BROWSER_SERVICE_MAX_WAIT = float(os.getenv("BROWSER_SERVICE_MAX_WAIT", "120"))  # seconds to wait for a lease
+
+class BrowserManager:
+    """One shared headless Chromium per worker; every scrape gets its own context
+
+    Launching Chromium costs far more than opening a context, so the browser is
+    started once (during warm-up, or by the first scrape) and relaunched if it
+    crashes or disconnects.
+
+    With a ``service_url`` the worker runs no browser of its own: each scrape
+    leases a slot from the shared browser service, opens its context in the
+    leased Chromium over CDP and gives the slot back afterwards.
+    """
+
+    def __init__(self, service_url: Optional[str] = None):
+        self.service_url = service_url.rstrip("/") if service_url else None
+        self._playwright = None
+        self._browser = None
+        self._remote: Dict[str, Any] = {}  # CDP URL -> connected Browser (service mode)
+        self._service_client: Optional[httpx.AsyncClient] = None
+        self._lock: Optional[asyncio.Lock] = None  # created on first use, inside the running loop
+        self.launches = 0
+        self.contexts_opened = 0
+        self.active_contexts = 0
+        self.leases = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def get_browser(self):
+        if self.connected:
+            return self._browser
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.connected:
+                await self._launch()
+        return self._browser
+
+    async def _start_playwright(self):
+        from playwright.async_api import async_playwright
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+    async def _launch(self):
+        await self._start_playwright()
+        if self._browser is not None:
+            logger.warning("Browser disconnected, relaunching")
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"Closing the disconnected browser failed: {e!r}")
+        start = time.perf_counter()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self.launches += 1
+        logger.info(f"Launched Chromium in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def _get_service_client(self) -> httpx.AsyncClient:
+        if self._service_client is None:
+            # Lease requests are long-polled while the service queues us
+            self._service_client = httpx.AsyncClient(base_url=self.service_url,
+                                                     timeout=BROWSER_SERVICE_MAX_WAIT + 10)
+        return self._service_client
+
+    async def _lease(self) -> Dict[str, Any]:
+        resp = await self._get_service_client().post(
+            "/leases", json={"worker": f"{socket.gethostname()}:{os.getpid()}", "max_wait": BROWSER_SERVICE_MAX_WAIT}
+        )
+        if resp.status_code == 429:
+            raise AdmissionRejected("browser service", int(resp.headers.get("retry-after", "5")))
+        resp.raise_for_status()
+        self.leases += 1
+        return resp.json()
+
+    async def _release(self, lease: Dict[str, Any]):
+        try:
+            await self._get_service_client().delete(f"/leases/{lease['id']}")
+        except httpx.HTTPError as e:
+            # The service reclaims leases that are never released, so this only costs capacity for a while
+            logger.warning(f"Could not release browser lease {lease['id']}: {e}")
+
+    async def _connect(self, cdp_url: str):
+        """Reuse one CDP connection per service browser; reconnect after it restarts"""
+        browser = self._remote.get(cdp_url)
+        if browser is not None and browser.is_connected():
+            return browser
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            browser = self._remote.get(cdp_url)
+            if browser is None or not browser.is_connected():
+                await self._start_playwright()
+                browser = await self._playwright.chromium.connect_over_cdp(cdp_url)
+                self._remote[cdp_url] = browser
+        return browser
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """A fresh browser context, closed again however the scrape ends"""
+        lease = None
+        if self.service_url:
+            lease = await self._lease()
+            try:
+                browser = await self._connect(lease["cdp_url"])
+                context = await browser.new_context(**options)
+            except BaseException:
+                await self._release(lease)
+                raise
+        else:
+            browser = await self.get_browser()
+            context = await browser.new_context(**options)
+        self.contexts_opened += 1
+        self.active_contexts += 1
+        try:
+            yield context
+        finally:
+            self.active_contexts -= 1
+            try:
+                await context.close()
+            except Exception as e:
+                # The browser went away underneath us; the next scrape relaunches (or re-leases) it
+                logger.debug(f"Closing a browser context failed: {e!r}")
+            if lease is not None:
+                await self._release(lease)
+
+    async def warm(self):
+        """Launch the local browser, or connect to every live browser in the service"""
+        if not self.service_url:
+            await self.get_browser()
+            return
+        resp = await self._get_service_client().get("/status")
+        resp.raise_for_status()
+        for browser in resp.json()["browsers"]:
+            if browser["alive"]:
+                await self._connect(browser["cdp_url"])
+
+    async def aclose(self):
+        for cdp_url, browser in self._remote.items():
+            try:
+                # For a CDP connection this only disconnects; the service keeps the browser
+                await browser.close()
+            except Exception as e:
+                logger.debug(f"Disconnecting from {cdp_url} failed: {e!r}")
+        self._remote.clear()
+        if self._service_client is not None:
+            await self._service_client.aclose()
+            self._service_client = None
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.warning(f"Closing the browser failed: {e!r}")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": "service" if self.service_url else "local",
+            "service_url": self.service_url,
+            "connected": self.connected if not self.service_url else
+                         any(browser.is_connected() for browser in self._remote.values()),
+            "leases": self.leases,
+            "launches": self.launches,
+            "contexts_opened": self.contexts_opened,
+            "active_contexts": self.active_contexts,
+        }
+
+browser_manager = BrowserManager(BROWSER_SERVICE_URL)
+
+# Screenshot settings (override from the environment)
+SCREENSHOT_MODE = os.getenv("SCREENSHOT_MODE", "full")  # "full": one PNG; "tiles": viewport-height tile set
+SCREENSHOT_MAX_HEIGHT = int(os.getenv("SCREENSHOT_MAX_HEIGHT", str(MAX_PAGE_HEIGHT)))  # pixels captured
+SCREENSHOT_TILE_FORMAT = os.getenv("SCREENSHOT_TILE_FORMAT", "jpeg")  # jpeg or png
+SCREENSHOT_TILE_QUALITY = int(os.getenv("SCREENSHOT_TILE_QUALITY", "80"))  # jpeg tiles and the preview
+SCREENSHOT_PREVIEW_WIDTH = int(os.getenv("SCREENSHOT_PREVIEW_WIDTH", "480"))  # stitched preview; 0 = none
+SCREENSHOT_STORE_DIR = os.getenv("SCREENSHOT_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".screenshots"))
+SCREENSHOT_TTL = int(os.getenv("SCREENSHOT_TTL", "3600"))  # seconds a tile set is kept on disk
+
+VIEWPORT = {'width': 1920, 'height': 1080}
+TILESET_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+TILE_NAME_RE = re.compile(r"^(\d{1,5}\.(jpg|png)|preview\.jpg|manifest\.json)$")
+
+class ScreenshotTileStore:
+    """Full-page screenshots captured as viewport-height tiles on disk
+
+    Each tile is rendered and written before the next one is taken, so neither
+    Chromium nor this process ever holds a whole tall page as one bitmap, and a
+    tile that fails to render is skipped instead of failing the scrape. A
+    manifest lists the tiles top to bottom so clients can load them
+    progressively; a stitched, downscaled preview is built from the files in a
+    worker thread (SCREENSHOT_PREVIEW_WIDTH=1920 gives a full-size stitch).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, tileset_id: str, name: str) -> Optional[str]:
+        if not TILESET_ID_RE.match(tileset_id) or not TILE_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.root, tileset_id, name)
+        return path if os.path.isfile(path) else None
+
+    def manifest(self, tileset_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(tileset_id, "manifest.json")
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _prepare(self, directory: str):
+        # Drop tile sets past their TTL, then make room for the new one
+        cutoff = time.time() - SCREENSHOT_TTL
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            try:
+                expired = entry.is_dir() and TILESET_ID_RE.match(entry.name) and entry.stat().st_mtime < cutoff
+            except FileNotFoundError:
+                # Another worker cleaned it up first
+                continue
+            if expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _stitch_preview(directory: str, tiles: List[Dict[str, Any]], width: int, height: int) -> bytes:
+        """Paste the tiles, scaled to SCREENSHOT_PREVIEW_WIDTH, into one JPEG (runs in a thread)"""
+        from PIL import Image
+
+        scale = min(1.0, SCREENSHOT_PREVIEW_WIDTH / width)
+        canvas = Image.new("RGB", (max(1, round(width * scale)), max(1, round(height * scale))), "white")
+        for tile in tiles:
+            with Image.open(os.path.join(directory, tile["name"])) as img:
+                img = img.convert("RGB")
+                if scale < 1.0:
+                    img = img.resize((canvas.width, max(1, round(tile["height"] * scale))), Image.Resampling.LANCZOS)
+                canvas.paste(img, (0, round(tile["y"] * scale)))
+        buffer = io.BytesIO()
+        canvas.save(buffer, "JPEG", quality=SCREENSHOT_TILE_QUALITY, optimize=True)
+        data = buffer.getvalue()
+        ScreenshotTileStore._write(os.path.join(directory, "preview.jpg"), data)
+        return data
+
+    async def capture(self, page, page_height: int, width: int = VIEWPORT['width'],
+                      tile_height: int = VIEWPORT['height']):
+        """Capture the page as tiles; returns (manifest, preview JPEG bytes or None)"""
+        tileset_id = uuid.uuid4().hex
+        directory = os.path.join(self.root, tileset_id)
+        await asyncio.to_thread(self._prepare, directory)
+
+        image_type = "png" if SCREENSHOT_TILE_FORMAT == "png" else "jpeg"
+        ext = "png" if image_type == "png" else "jpg"
+        height = max(1, min(page_height, SCREENSHOT_MAX_HEIGHT))
+        tiles: List[Dict[str, Any]] = []
+        failed: List[int] = []
+        for index, y in enumerate(range(0, height, tile_height)):
+            clip = {'x': 0, 'y': y, 'width': width, 'height': min(tile_height, height - y)}
+            options: Dict[str, Any] = {'type': image_type, 'full_page': True, 'clip': clip}
+            if image_type == "jpeg":
+                options['quality'] = SCREENSHOT_TILE_QUALITY
+            try:
+                data = await page.screenshot(**options)
+            except Exception as e:
+                logger.warning(f"Screenshot tile {index} (y={y}) failed: {e}")
+                failed.append(index)
+                continue
+            name = f"{index}.{ext}"
+            await asyncio.to_thread(self._write, os.path.join(directory, name), data)
+            tiles.append({"index": index, "name": name, "y": y, "height": clip['height'], "bytes": len(data),
+                          "url": f"/screenshots/{tileset_id}/{name}"})
+
+        manifest: Dict[str, Any] = {
+            "id": tileset_id,
+            "url": f"/screenshots/{tileset_id}",
+            "width": width,
+            "height": height,
+            "page_height": page_height,
+            "tile_height": tile_height,
+            "format": image_type,
+            "tiles": tiles,
+            "failed_tiles": failed,
+            "preview": None,
+        }
+        preview = None
+        if SCREENSHOT_PREVIEW_WIDTH > 0 and tiles:
+            try:
+                preview = await asyncio.to_thread(self._stitch_preview, directory, tiles, width, height)
+                manifest["preview"] = f"/screenshots/{tileset_id}/preview.jpg"
+            except Exception as e:
+                logger.warning(f"Could not build the screenshot preview: {e}")
+        await asyncio.to_thread(self._write, os.path.join(directory, "manifest.json"),
+                                json.dumps(manifest).encode("utf-8"))
+        return manifest, preview
+
+screenshot_store = ScreenshotTileStore(SCREENSHOT_STORE_DIR)
 
 # Main class for scraping websites and extracting design context
 class WebScraper:
     """Enhanced web scraping class with comprehensive design context extraction"""
     
     @staticmethod
-    async def download_css(stylesheet_urls, base_url):
-        # Download all CSS files (handles relative URLs too)
+    async def download_css(stylesheet_urls, base_url, limits_hit: Optional[List[str]] = None):
+        # Download all CSS files (handles relative URLs too), stopping at the size caps
         css_contents = []
+        total_bytes = 0
+        limits_hit = limits_hit if limits_hit is not None else []
         async with httpx.AsyncClient() as client:
             for url in stylesheet_urls:
+                if total_bytes >= MAX_TOTAL_CSS_BYTES:
+                    limits_hit.append("total_css_bytes")
+                    break
                 # If the URL is relative, prepend the base URL
                 if url.startswith('/'):
                     url = base_url.rstrip('/') + url
                 try:
-                    # Try to fetch the CSS file
-                    resp = await client.get(url, timeout=10)
-                    if resp.status_code == 200:
-                        css_contents.append(resp.text)
+                    # Stream the CSS file so a huge sheet never sits in memory whole
+                    async with client.stream("GET", url, timeout=10) as resp:
+                        if resp.status_code != 200:
+                            continue
+                        budget = min(MAX_STYLESHEET_BYTES, MAX_TOTAL_CSS_BYTES - total_bytes)
+                        body = bytearray()
+                        async for chunk in resp.aiter_bytes():
+                            body.extend(chunk)
+                            if len(body) >= budget:
+                                limits_hit.append("stylesheet_bytes")
+                                break
+                        del body[budget:]
+                        total_bytes += len(body)
+                        css_contents.append(body.decode(resp.encoding or 'utf-8', errors='replace'))
                 except Exception as e:
                     # Log any errors but continue with other files
                     print(f"Failed to download CSS from {url}: {e}")
         return css_contents
 
+    @staticmethod
+    async def scrape(url: str) -> Dict[str, Any]:
+        """fetch_page_data behind the browser admission queue and its rate limit (429 when either is full)"""
+        async with scrape_admission.slot():
+            return await WebScraper.fetch_page_data(url)
+
     @staticmethod
     async def fetch_page_data(url: str, max_retries: int = 3) -> Dict[str, Any]:
-        """Fetch complete page data with retry mechanism and rate limiting"""
-        rate_limit()  # Make sure we don't go over our rate limit
+        """Fetch complete page data with retry mechanism (callers go through scrape for rate limiting)"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
         for attempt in range(max_retries):
             try:
-                async with async_playwright() as p:
-                    # Launch a headless browser
-                    browser = await p.chromium.launch(headless=True)
-                    context = await browser.new_context(
-                        viewport={'width': 1920, 'height': 1080},
-                        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                        java_script_enabled=True
-                    )
+                # A fresh context in the worker's shared browser, rather than a new browser per scrape
+                async with browser_manager.context(
+                    viewport=VIEWPORT,
+                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                    java_script_enabled=True
+                ) as context:
                     page = await context.new_page()
+                    limits_hit: List[str] = []
                     try:
                         # Try to load the page and wait for network to be idle
                         await page.goto(str(url), wait_until='networkidle', timeout=30000)
@@ -125,9 +834,10 @@ class WebScraper:
                         logger.warning(f"Timeout while loading {url}, continuing with partial content")
                     await page.wait_for_load_state('domcontentloaded')
                     
-                    # Scroll to the bottom to trigger lazy loading
+                    # Scroll to the bottom to trigger lazy loading (never past MAX_PAGE_HEIGHT,
+                    # otherwise an infinite-scroll page keeps growing forever)
                     await page.evaluate("""
-                        async () => {
+                        async (maxHeight) => {
                             await new Promise((resolve) => {
                                 let totalHeight = 0;
                                 const distance = 100;
@@ -135,19 +845,32 @@ class WebScraper:
                                     const scrollHeight = document.body.scrollHeight;
                                     window.scrollBy(0, distance);
                                     totalHeight += distance;
-                                    if(totalHeight >= scrollHeight){
+                                    if(totalHeight >= scrollHeight || totalHeight >= maxHeight){
                                         clearInterval(timer);
                                         resolve();
                                     }
                                 }, 100);
                             });
                         }
+                    """, MAX_PAGE_HEIGHT)
+                    
+                    # Measure the page before collecting anything so we know which caps apply
+                    page_stats = await page.evaluate("""
+                        () => ({
+                            dom_nodes: document.getElementsByTagName('*').length,
+                            page_height: document.documentElement.scrollHeight,
+                            js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null
+                        })
                     """)
+                    if page_stats['dom_nodes'] > MAX_DOM_NODES:
+                        limits_hit.append("dom_nodes")
+                    if page_stats['page_height'] > MAX_PAGE_HEIGHT:
+                        limits_hit.append("page_height")
                     
                     # Get all network assets (images, fonts, etc.)
                     assets = await page.evaluate("""
-                        () => {
-                            const resources = performance.getEntriesByType('resource');
+                        (limit) => {
+                            const resources = performance.getEntriesByType('resource').slice(0, limit);
                             return resources.map(resource => ({
                                 url: resource.name,
                                 type: resource.initiatorType,
@@ -155,25 +878,27 @@ class WebScraper:
                                 duration: resource.duration
                             }));
                         }
-                    """)
+                    """, MAX_COLLECTED_ITEMS + 1)
+                    assets = WebScraper._cap_items(assets, "assets", limits_hit)
                     
                     # Get all font families used on the page
                     fonts = await page.evaluate("""
-                        () => {
+                        (maxNodes) => {
                             const fontFamilies = new Set();
-                            document.querySelectorAll('*').forEach(el => {
-                                const computed = window.getComputedStyle(el);
-                                fontFamilies.add(computed.fontFamily);
-                            });
+                            const elements = document.getElementsByTagName('*');
+                            const count = Math.min(elements.length, maxNodes);
+                            for (let i = 0; i < count; i++) {
+                                fontFamilies.add(window.getComputedStyle(elements[i]).fontFamily);
+                            }
                             return Array.from(fontFamilies);
                         }
-                    """)
+                    """, MAX_DOM_NODES)
                     
                     # Get all media queries from stylesheets
                     media_queries = await page.evaluate("""
-                        () => {
+                        (limit) => {
                             const queries = [];
-                            for (let i = 0; i < document.styleSheets.length; i++) {
+                            for (let i = 0; i < document.styleSheets.length && queries.length < limit; i++) {
                                 try {
                                     const sheet = document.styleSheets[i];
                                     if (sheet.cssRules) {
@@ -193,24 +918,25 @@ class WebScraper:
                             }
                             return queries;
                         }
-                    """)
+                    """, MAX_COLLECTED_ITEMS + 1)
+                    media_queries = WebScraper._cap_items(media_queries, "media_queries", limits_hit)
                     
-                    # Get all <style> tag contents
+                    # Get all <style> tag contents (each one cut at the stylesheet cap)
                     embedded_styles = await page.evaluate("""
-                        () => {
-                            const styles = [];
-                            document.querySelectorAll('style').forEach(style => {
-                                styles.push(style.textContent);
-                            });
-                            return styles;
+                        ([limit, maxChars]) => {
+                            return Array.from(document.querySelectorAll('style'))
+                                .slice(0, limit)
+                                .map(style => (style.textContent || '').slice(0, maxChars));
                         }
-                    """)
+                    """, [MAX_COLLECTED_ITEMS + 1, MAX_STYLESHEET_BYTES])
+                    embedded_styles = WebScraper._cap_items(embedded_styles, "embedded_styles", limits_hit)
                     
                     # Get all inline styles from elements
                     inline_styles = await page.evaluate("""
-                        () => {
+                        (limit) => {
                             const styles = [];
-                            document.querySelectorAll('[style]').forEach(el => {
+                            for (const el of document.querySelectorAll('[style]')) {
+                                if (styles.length >= limit) break;
                                 const className = el.className;
                                 const classStr = typeof className === 'string' ? className : 
                                     (className.baseVal || '');  // Handle SVGAnimatedString
@@ -220,15 +946,46 @@ class WebScraper:
                                         (classStr ? '.' + classStr.split(' ').join('.') : ''),
                                     style: el.getAttribute('style')
                                 });
-                            });
+                            }
                             return styles;
                         }
-                    """)
+                    """, MAX_COLLECTED_ITEMS + 1)
+                    inline_styles = WebScraper._cap_items(inline_styles, "inline_styles", limits_hit)
+                    
+                    # Get the HTML (cut in the browser, so a huge document never crosses over whole)
+                    captured = await page.evaluate("""
+                        (maxChars) => {
+                            const html = document.documentElement.outerHTML;
+                            return {html: html.slice(0, maxChars), length: html.length};
+                        }
+                    """, MAX_HTML_CHARS)
+                    html = "<!DOCTYPE html>" + captured['html']
+                    page_stats['html_chars'] = captured['length']
+                    if captured['length'] > MAX_HTML_CHARS:
+                        limits_hit.append("html_chars")
                     
-                    # Get the full HTML and a screenshot
-                    html = await page.content()
-                    screenshot_bytes = await page.screenshot(type='png', full_page=True)
-                    screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
+                    # Screenshot, clipped to SCREENSHOT_MAX_HEIGHT for very tall pages
+                    screenshot_tiles = None
+                    if page_stats['page_height'] > SCREENSHOT_MAX_HEIGHT:
+                        limits_hit.append("screenshot_height")
+                    if SCREENSHOT_MODE == "tiles":
+                        # Tiles on disk; the inline screenshot becomes the small stitched preview.
+                        # A full disk or an unwritable store costs the screenshot, not the scrape.
+                        try:
+                            screenshot_tiles, preview = await screenshot_store.capture(page, page_stats['page_height'])
+                        except Exception as e:
+                            logger.warning(f"Tiled screenshot of {url} failed: {e!r}")
+                            screenshot_tiles, preview = None, None
+                        screenshot_base64 = base64.b64encode(preview).decode('utf-8') if preview else None
+                    else:
+                        if page_stats['page_height'] > SCREENSHOT_MAX_HEIGHT:
+                            screenshot_bytes = await page.screenshot(
+                                type='png', full_page=True,
+                                clip={'x': 0, 'y': 0, 'width': VIEWPORT['width'], 'height': SCREENSHOT_MAX_HEIGHT}
+                            )
+                        else:
+                            screenshot_bytes = await page.screenshot(type='png', full_page=True)
+                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
                     
                     # Get all stylesheet URLs (including @import)
                     stylesheets = await page.evaluate("""
@@ -259,13 +1016,16 @@ class WebScraper:
                     # Download the actual CSS contents
                     parsed_url = url.split("/")
                     base_url = parsed_url[0] + "//" + parsed_url[2] if len(parsed_url) > 2 else url
-                    css_contents = await WebScraper.download_css(stylesheets, base_url)
+                    css_contents = await WebScraper.download_css(stylesheets[:MAX_COLLECTED_ITEMS], base_url, limits_hit)
                     
                     # Get computed styles for all elements (for color/typography extraction)
                     computed_styles = await page.evaluate("""
-                        () => {
+                        (maxNodes) => {
                             const styles = {};
-                            document.querySelectorAll('*').forEach((el, index) => {
+                            const elements = document.getElementsByTagName('*');
+                            const count = Math.min(elements.length, maxNodes);
+                            for (let index = 0; index < count; index++) {
+                                const el = elements[index];
                                 try {
                                     const computed = window.getComputedStyle(el);
                                     styles[el.tagName.toLowerCase() + '_' + index] = {
@@ -294,10 +1054,10 @@ class WebScraper:
                                         }
                                     };
                                 } catch (e) {}
-                            });
+                            }
                             return styles;
                         }
-                    """)
+                    """, MAX_DOM_NODES)
                     
                     # Get meta tags (for SEO info)
                     meta_info = await page.evaluate("""
@@ -313,10 +1073,10 @@ class WebScraper:
                         }
                     """)
                     
-                    await browser.close()
                     return {
                         'html': html,
                         'screenshot': screenshot_base64,
+                        'screenshot_tiles': screenshot_tiles,
                         'stylesheets': stylesheets,
                         'css_contents': css_contents,
                         'computed_styles': computed_styles,
@@ -325,8 +1085,13 @@ class WebScraper:
                         'fonts': fonts,
                         'media_queries': media_queries,
                         'embedded_styles': embedded_styles,
-                        'inline_styles': inline_styles
+                        'inline_styles': inline_styles,
+                        'limits_hit': sorted(set(limits_hit)),
+                        'page_stats': page_stats
                     }
+            except AdmissionRejected:
+                # The shared browser service is saturated; retrying here would only add to its queue
+                raise
             except Exception as e:
                 logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
                 if attempt == max_retries - 1:
@@ -334,9 +1099,24 @@ class WebScraper:
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
         raise HTTPException(status_code=500, detail="Failed to fetch page data")
     
+    @staticmethod
+    def _cap_items(items: List[Any], name: str, limits_hit: List[str]) -> List[Any]:
+        # Browser-side collectors return one extra item so we can tell when a list was cut
+        if len(items) > MAX_COLLECTED_ITEMS:
+            limits_hit.append(name)
+            return items[:MAX_COLLECTED_ITEMS]
+        return items
+    
     @staticmethod
     def extract_design_context(html: str, page_data: Dict[str, Any]) -> DesignContext:
         """Extract comprehensive design context from scraped data"""
+        from bs4 import BeautifulSoup
+
+        limits_hit = list(page_data.get('limits_hit', []))
+        if len(html) > MAX_HTML_CHARS:
+            # Saved or hand-built page data may not have gone through the browser-side cap
+            html = html[:MAX_HTML_CHARS]
+            limits_hit.append("html_chars")
         soup = BeautifulSoup(html, 'html.parser')
         
         # Remove scripts and unwanted elements for cleaner parsing
@@ -350,7 +1130,9 @@ class WebScraper:
         
         # Extract main content structure (headings, paragraphs, etc.)
         content_structure = []
-        for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'button', 'nav', 'header', 'footer', 'section', 'article']):
+        for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'button', 'nav', 'header', 'footer', 'section', 'article'], limit=MAX_DOM_NODES):
+            if len(content_structure) >= 20:
+                break
             text = tag.get_text(strip=True)
             if text and len(text) > 2:
                 content_structure.append({
@@ -361,13 +1143,14 @@ class WebScraper:
                     'style': tag.get('style', '')
                 })
         
-        # Extract color palette from computed styles
-        colors = set()
+        # Extract color palette from computed styles (a dict keeps first-seen order,
+        # so the same page always yields the same palette, whatever the hash seed)
+        colors: Dict[str, None] = {}
         for element_styles in page_data.get('computed_styles', {}).values():
             if element_styles.get('computed', {}).get('color'):
-                colors.add(element_styles['computed']['color'])
+                colors.setdefault(element_styles['computed']['color'])
             if element_styles.get('computed', {}).get('backgroundColor'):
-                colors.add(element_styles['computed']['backgroundColor'])
+                colors.setdefault(element_styles['computed']['backgroundColor'])
         
         # Extract typography info from headings
         typography = {}
@@ -378,18 +1161,15 @@ class WebScraper:
                     'fontSize': element_styles.get('computed', {}).get('fontSize', '')
                 }
         
-        # Extract layout info (sections, headers, etc.)
-        layout_sections = []
-        for section in soup.find_all(['header', 'nav', 'main', 'section', 'aside', 'footer']):
-            layout_sections.append({
-                'tag': section.name,
-                'class': ' '.join(section.get('class', [])),
-                'children_count': len(section.find_all())
-            })
+        # Extract layout info: the page's top-level blocks (landmarks or not), with
+        # enough per-block content that each one can be generated on its own
+        layout_sections, unplanned = WebScraper._layout_blocks(soup.body if soup.body else soup)
         
         # Extract all images (up to 10)
         images = []
-        for img in soup.find_all('img'):
+        for img in soup.find_all('img', limit=MAX_DOM_NODES):
+            if len(images) >= 10:
+                break
             img_info = {
                 'src': img.get('src', ''),
                 'alt': img.get('alt', ''),
@@ -408,7 +1188,7 @@ class WebScraper:
             content_structure=content_structure[:20],  # Limit to first 20 elements
             color_palette=list(colors)[:10],  # Limit to 10 colors
             typography=typography,
-            layout_info={'sections': layout_sections},
+            layout_info={'sections': layout_sections, 'unplanned': unplanned},
             images=images[:10],  # Limit to 10 images
             stylesheets=page_data.get('stylesheets', [])[:5],  # Limit to 5 stylesheets
             dom_structure=dom_structure,
@@ -419,9 +1199,89 @@ class WebScraper:
             fonts=page_data.get('fonts', []),
             media_queries=page_data.get('media_queries', []),
             embedded_styles=page_data.get('embedded_styles', []),
-            inline_styles=page_data.get('inline_styles', [])
+            inline_styles=page_data.get('inline_styles', []),
+            limits_hit=sorted(set(limits_hit)),
+            page_stats=page_data.get('page_stats', {}),
+            screenshot_tiles=page_data.get('screenshot_tiles')
         )
     
+    LANDMARKS = ('header', 'nav', 'main', 'section', 'aside', 'footer')
+    MEDIA_TAGS = ('img', 'svg', 'picture', 'video', 'canvas', 'iframe')
+    BLOCK_TEXT_CHARS = 300
+
+    @staticmethod
+    def _bounded_text(element, limit: int) -> str:
+        # get_text(' ', strip=True)[:limit], without joining the whole subtree first
+        parts, size = [], 0
+        for text in element.stripped_strings:
+            parts.append(text)
+            size += len(text) + 1
+            if size > limit:
+                break
+        return ' '.join(parts)[:limit]
+
+    @staticmethod
+    def _layout_blocks(root) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """The top-level blocks of a page in document order, and the content left outside them
+
+        Blocks are the element children of <body>, looking through wrappers that
+        hold a single element (``<div id="root">``), plus the children of <main>,
+        which is listed itself with its children marked ``parent: "main"``. Text
+        sitting directly between blocks, and blocks past MAX_COLLECTED_ITEMS, are
+        returned as unplanned so callers can report what a per-block clone misses.
+        """
+        from bs4 import NavigableString, Tag
+
+        def content_children(container):
+            elements, stray = [], []
+            for child in container.children:
+                if isinstance(child, Tag):
+                    if (next(child.stripped_strings, None) is not None or child.name in WebScraper.MEDIA_TAGS
+                            or child.find(WebScraper.MEDIA_TAGS) is not None):
+                        elements.append(child)
+                elif isinstance(child, NavigableString) and child.strip():
+                    stray.append(child.strip())
+            return elements, stray
+
+        def unwrap(container):
+            # Look through single-element wrappers that are not landmarks themselves
+            elements, stray = content_children(container)
+            while len(elements) == 1 and not stray and elements[0].name not in WebScraper.LANDMARKS:
+                inner, inner_stray = content_children(elements[0])
+                if not inner:
+                    break
+                elements, stray = inner, inner_stray
+            return elements, stray
+
+        def describe(element, parent: str) -> Dict[str, Any]:
+            return {
+                'tag': element.name,
+                'class': ' '.join(element.get('class', [])),
+                'id': element.get('id', ''),
+                'parent': parent,
+                'children_count': len(element.find_all(limit=MAX_DOM_NODES)),
+                'headings': [WebScraper._bounded_text(h, 100) for h in element.find_all(['h1', 'h2', 'h3'], limit=5)],
+                'text': WebScraper._bounded_text(element, WebScraper.BLOCK_TEXT_CHARS),
+                'images': [img.get('src') for img in element.find_all('img', limit=3) if img.get('src')]
+            }
+
+        blocks: List[Dict[str, Any]] = []
+        unplanned: List[Dict[str, Any]] = []
+
+        def add(elements, stray, parent: str):
+            unplanned.extend({'tag': '#text', 'parent': parent, 'text': text[:100]} for text in stray)
+            for element in elements:
+                if len(blocks) >= MAX_COLLECTED_ITEMS:
+                    unplanned.append({'tag': element.name, 'id': element.get('id', ''), 'parent': parent,
+                                      'text': WebScraper._bounded_text(element, 100)})
+                    continue
+                blocks.append(describe(element, parent))
+                if element.name == 'main' and not parent:
+                    add(*unwrap(element), 'main')
+
+        add(*unwrap(root), '')
+        return blocks, unplanned
+
     @staticmethod
     def _create_dom_structure(element, max_depth=3, current_depth=0):
         """Create a simplified DOM structure representation"""
@@ -452,11 +1312,458 @@ class WebScraper:
         
         return structure
 
+# Section-parallel generation settings (override from the environment)
+SECTION_MAX_UNITS = int(os.getenv("SECTION_MAX_UNITS", "12"))
+SECTION_MAX_TOKENS = int(os.getenv("SECTION_MAX_TOKENS", "2048"))
+SECTION_HEAD_MAX_TOKENS = int(os.getenv("SECTION_HEAD_MAX_TOKENS", "4096"))
+SECTION_MAX_ATTEMPTS = int(os.getenv("SECTION_MAX_ATTEMPTS", "2"))
+SECTION_CONTENT_CHARS = 4000  # slice of the content variations each section prompt sees
+
+# Generated sections/heads, keyed by their own scraped context
+section_cache = TTLCache(maxsize=500, ttl=3600)
+
+# LLM provider settings (override any of these from the environment)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # seconds per attempt
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+LLM_PROVIDER_CONCURRENCY = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+    "mock": int(os.getenv("MOCK_MAX_CONCURRENCY", "64")),
+}
+MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "50"))
+
+class LLMProvider:
+    """Base class for LLM backends: one long-lived client, bounded concurrency and retries"""
+
+    name = "base"
+    default_max_tokens = 2048
+    # HTTP statuses worth retrying: rate limiting and transient server errors
+    RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _generate(self, model: str, system_message: str, prompt: str,
+                        temperature: float, max_tokens: int, task_type: str) -> str:
+        raise NotImplementedError
+
+    async def generate(self, model: str, system_message: str, prompt: str,
+                       temperature: float = 0.7, max_tokens: Optional[int] = None,
+                       task_type: str = "analysis") -> str:
+        """Call the model, retrying 429/5xx and network errors with jittered backoff"""
+        max_tokens = max_tokens or self.default_max_tokens
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(
+                        self._generate(model, system_message, prompt, temperature, max_tokens, task_type),
+                        timeout=LLM_TIMEOUT
+                    )
+            except Exception as e:
+                retryable, retry_after = self._classify_error(e)
+                if not retryable or attempt == LLM_MAX_RETRIES:
+                    raise
+                # Full jitter keeps a burst of 429s from retrying in lockstep
+                delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+                if retry_after:
+                    delay = max(delay, min(retry_after, LLM_BACKOFF_MAX))
+                logger.warning(f"{self.name} call failed ({e!r}), retrying in {delay:.2f}s "
+                               f"(attempt {attempt + 1}/{LLM_MAX_RETRIES})")
+                await asyncio.sleep(delay)
+
+    @classmethod
+    def _classify_error(cls, exc: Exception):
+        """Return (retryable, retry_after_seconds) for an exception raised by a client"""
+        if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError, ConnectionError)):
+            return True, None
+        # OpenAI errors expose status_code, google.api_core errors expose code
+        status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        try:
+            status = int(status)
+        except (TypeError, ValueError):
+            status = None
+        retry_after = None
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is not None:
+            try:
+                retry_after = float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        if status is None:
+            # Connection/timeout errors from the SDKs carry no status
+            return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "ServiceUnavailable",
+                                          "DeadlineExceeded"), retry_after
+        return status in cls.RETRYABLE_STATUSES, retry_after
+
+    async def warm(self):
+        """Import the SDK and open connections ahead of the first real call (warm-up)"""
+        pass
+
+    async def aclose(self):
+        pass
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions through a single pooled AsyncOpenAI client"""
+
+    name = "openai"
+    default_max_tokens = 2000
+
+    def __init__(self, max_concurrency: int):
+        super().__init__(max_concurrency)
+        self._client = None
+
+    async def _get_client(self):
+        if self._client is None:
+            # Importing the SDK takes long enough to stall every other request, so do it off the loop
+            openai = await asyncio.to_thread(importlib.import_module, "openai")
+            if self._client is None:  # a concurrent first call may have got here first
+                http_client = httpx.AsyncClient(
+                    timeout=LLM_TIMEOUT,
+                    limits=httpx.Limits(max_connections=self.max_concurrency * 2,
+                                        max_keepalive_connections=self.max_concurrency)
+                )
+                # Retries are handled by LLMProvider.generate, not the SDK
+                self._client = openai.AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    max_retries=0,
+                    http_client=http_client
+                )
+        return self._client
+
+    async def _generate(self, model, system_message, prompt, temperature, max_tokens, task_type):
+        client = await self._get_client()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def warm(self):
+        # A cheap authenticated request leaves a TLS connection in the pool
+        client = await self._get_client()
+        await client.models.list()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+class GeminiProvider(LLMProvider):
+    """Gemini through the SDK's async API, reusing one GenerativeModel per (model, system prompt)"""
+
+    name = "gemini"
+
+    def __init__(self, max_concurrency: int):
+        super().__init__(max_concurrency)
+        self._models: Dict[tuple, Any] = {}
+        self._genai = None
+
+    async def _sdk(self):
+        if self._genai is None:
+            # Importing the SDK (and gRPC) takes long enough to stall every other request, so do it off the loop
+            genai = await asyncio.to_thread(importlib.import_module, "google.generativeai")
+            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            self._genai = genai
+        return self._genai
+
+    async def _get_model(self, model: str, system_message: str):
+        key = (model, system_message)
+        if key not in self._models:
+            genai = await self._sdk()
+            self._models[key] = genai.GenerativeModel(model, system_instruction=system_message)
+        return self._models[key]
+
+    async def warm(self):
+        # The SDK opens its gRPC channel lazily per call, so loading it is all we can do ahead of time
+        await self._sdk()
+
+    async def _generate(self, model, system_message, prompt, temperature, max_tokens, task_type):
+        generation_config = {
+            "temperature": temperature,
+            "top_p": 0.8,
+            "top_k": 40,
+            "max_output_tokens": max_tokens,
+        }
+        generative_model = await self._get_model(model, system_message)
+        response = await generative_model.generate_content_async(
+            prompt, generation_config=generation_config
+        )
+        return response.text
+
+class MockProvider(LLMProvider):
+    """Offline provider for tests and local development (any model name starting with "mock")"""
+
+    name = "mock"
+
+    RESPONSES = {
+        "html": "<!DOCTYPE html><html><head><title>Mock clone</title></head>"
+                "<body><main><h1>Mock clone</h1><p>Generated by the mock provider.</p></main></body></html>",
+        "head": "<title>Mock clone</title><style>body { font-family: sans-serif; }</style>",
+        "section": "<section><h2>Mock section</h2><p>Generated by the mock provider.</p></section>",
+    }
+
+    def __init__(self, max_concurrency: int, latency_ms: float = MOCK_LLM_LATENCY_MS):
+        super().__init__(max_concurrency)
+        self.latency_ms = latency_ms
+        self.calls: List[Dict[str, Any]] = []
+
+    async def _generate(self, model, system_message, prompt, temperature, max_tokens, task_type):
+        self.calls.append({"model": model, "task_type": task_type, "prompt_chars": len(prompt)})
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        return self.RESPONSES.get(task_type, f"Mock {task_type} response for {model}.")
+
+class LLMProviderRegistry:
+    """Creates one provider per backend on first use and hands it out by model name"""
+
+    FACTORIES = {
+        "openai": OpenAIProvider,
+        "gemini": GeminiProvider,
+        "mock": MockProvider,
+    }
+
+    def __init__(self):
+        self._providers: Dict[str, LLMProvider] = {}
+
+    @staticmethod
+    def provider_name(model: str) -> str:
+        if model.startswith("mock"):
+            return "mock"
+        if model.startswith("gemini") or model.startswith("models/gemini"):
+            return "gemini"
+        return "openai"
+
+    def get(self, name: str) -> LLMProvider:
+        if name not in self._providers:
+            self._providers[name] = self.FACTORIES[name](LLM_PROVIDER_CONCURRENCY[name])
+        return self._providers[name]
+
+    def for_model(self, model: str) -> LLMProvider:
+        return self.get(self.provider_name(model))
+
+    async def aclose(self):
+        for provider in self._providers.values():
+            await provider.aclose()
+        self._providers.clear()
+
+llm_providers = LLMProviderRegistry()
+
+async def close_llm_providers():
+    await llm_providers.aclose()
+
+# Model routing settings (override from the environment)
+ROUTING_ENABLED = os.getenv("ROUTING_ENABLED", "1") == "1"
+ROUTING_HEDGING_ENABLED = os.getenv("ROUTING_HEDGING", "1") == "1"
+ROUTING_HEDGE_PERCENTILE = float(os.getenv("ROUTING_HEDGE_PERCENTILE", "95"))
+ROUTING_DEFAULT_HEDGE_AFTER = float(os.getenv("ROUTING_DEFAULT_HEDGE_AFTER", "45"))  # seconds, until we have samples
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "20"))
+ROUTING_WINDOW = int(os.getenv("ROUTING_WINDOW", "200"))  # calls remembered per model
+ROUTING_MAX_ERROR_RATE = float(os.getenv("ROUTING_MAX_ERROR_RATE", "0.5"))
+
+# Per-request routing state: whether routing is on and the decisions made so far.
+# Tasks spawned with asyncio.gather copy the context, so they append to the same list.
+routing_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("routing_context", default=None)
+
+class ModelStats:
+    """Rolling latency and error statistics for one model on one task type"""
+
+    def __init__(self, window: int = ROUTING_WINDOW):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.outcomes = deque(maxlen=window)   # True for success
+
+    def record(self, latency: float, ok: bool):
+        """One finished call; a cancelled one (a lost hedge race) counts as ok with its elapsed time"""
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.latencies) < ROUTING_MIN_SAMPLES:
+            return None
+        return percentile(self.latencies, pct)
+
+    @property
+    def error_rate(self) -> float:
+        return (1 - sum(self.outcomes) / len(self.outcomes)) if self.outcomes else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "calls": len(self.outcomes),
+            "error_rate": round(self.error_rate, 3),
+            "p50_s": round(p50, 3) if p50 is not None else None,
+            "p95_s": round(p95, 3) if p95 is not None else None,
+        }
+
+class ModelRouter:
+    """Picks a model per task type and hedges slow calls onto a fallback model
+
+    Cheap steps (analysis, content, style, overview) run on a fast tier; the
+    HTML steps stay on the model the client asked for. If a call runs past the
+    model's recent p95 (ROUTING_HEDGE_PERCENTILE), the same prompt is sent to a
+    fallback model, the first good answer wins and the other call is cancelled.
+    """
+
+    TASK_TIERS = {
+        "overview": "fast",
+        "analysis": "fast",
+        "content": "fast",
+        "style": "fast",
+        "html": "quality",
+        "head": "quality",
+        "section": "quality",
+    }
+
+    # Candidate models per tier and provider, in order of preference
+    TIER_MODELS = {
+        "fast": {
+            "openai": ["gpt-4o-mini", "gpt-3.5-turbo"],
+            "gemini": ["gemini-1.5-flash-latest"],
+            "mock": ["mock-fast", "mock-fast-backup"],
+        },
+        "quality": {
+            "openai": ["gpt-4o", "gpt-4-turbo"],
+            "gemini": ["gemini-1.5-pro-latest"],
+            "mock": ["mock", "mock-backup"],
+        },
+    }
+
+    # Providers we can fall back to, keyed by the environment variable that enables them
+    PROVIDER_KEYS = {"openai": "OPENAI_API_KEY", "gemini": "GOOGLE_API_KEY"}
+
+    def __init__(self):
+        # Keyed by (model, task_type): a 200-token style call and a 4000-token HTML call on the
+        # same model have very different latencies, so one p95 would hedge one far too early
+        self.stats: Dict[tuple, ModelStats] = defaultdict(ModelStats)
+
+    def _healthy(self, model: str, task_type: str) -> bool:
+        stats = self.stats[model, task_type]
+        return len(stats.outcomes) < ROUTING_MIN_SAMPLES or stats.error_rate <= ROUTING_MAX_ERROR_RATE
+
+    def route(self, requested_model: str, task_type: str):
+        """Return (tier, primary model, fallback model or None)"""
+        tier = self.TASK_TIERS.get(task_type, "quality")
+        provider = LLMProviderRegistry.provider_name(requested_model)
+        candidates = self.TIER_MODELS[tier].get(provider, [])
+        if tier == "quality" or requested_model in candidates:
+            # The client's choice decides the final output (and an explicitly fast model stays put)
+            primary = requested_model
+        else:
+            primary = next((m for m in candidates if self._healthy(m, task_type)),
+                           candidates[0] if candidates else requested_model)
+
+        # Prefer a different provider for the fallback: its latency is independent of ours
+        fallback = None
+        if provider != "mock":
+            for other, env_key in self.PROVIDER_KEYS.items():
+                if other != provider and os.getenv(env_key) and self.TIER_MODELS[tier].get(other):
+                    fallback = self.TIER_MODELS[tier][other][0]
+                    break
+        if fallback is None:
+            fallback = next((m for m in candidates if m != primary), None)
+        return tier, primary, fallback
+
+    def hedge_delay(self, model: str, task_type: str) -> float:
+        threshold = self.stats[model, task_type].percentile(ROUTING_HEDGE_PERCENTILE)
+        return threshold if threshold is not None else ROUTING_DEFAULT_HEDGE_AFTER
+
+    async def _run(self, model: str, system_message: str, prompt: str,
+                   max_tokens: Optional[int], task_type: str) -> str:
+        # Every provider call holds its own LLM slot, hedges included, so MAX_CONCURRENT_LLM_CALLS
+        # stays a real limit; timing starts once admitted so queueing isn't blamed on the model
+        async with llm_admission.slot():
+            start = time.perf_counter()
+            try:
+                result = await llm_providers.for_model(model).generate(
+                    LLMCloner.MODELS.get(model, model), system_message, prompt,
+                    max_tokens=max_tokens, task_type=task_type
+                )
+            except asyncio.CancelledError:
+                # Lost a hedge race. That says nothing about errors, but the elapsed time is a
+                # lower bound on its latency; dropping it would make the p95 look better than it is.
+                self.stats[model, task_type].record(time.perf_counter() - start, ok=True)
+                raise
+            except Exception:
+                self.stats[model, task_type].record(time.perf_counter() - start, ok=False)
+                raise
+            self.stats[model, task_type].record(time.perf_counter() - start, ok=True)
+            return result
+
+    async def generate(self, requested_model: str, task_type: str, system_message: str,
+                       prompt: str, max_tokens: Optional[int] = None) -> str:
+        context = routing_context.get()
+        enabled = context["enabled"] if context else ROUTING_ENABLED
+        if enabled:
+            tier, primary, fallback = self.route(requested_model, task_type)
+        else:
+            tier, primary, fallback = self.TASK_TIERS.get(task_type, "quality"), requested_model, None
+        decision = {"task_type": task_type, "tier": tier, "requested": requested_model,
+                    "primary": primary, "fallback": fallback, "hedged": False, "failover": False}
+        if context is not None:
+            context["decisions"].append(decision)
+
+        start = time.perf_counter()
+        tasks = {asyncio.create_task(self._run(primary, system_message, prompt, max_tokens, task_type)): primary}
+        try:
+            if fallback:
+                hedge_after = self.hedge_delay(primary, task_type) if ROUTING_HEDGING_ENABLED else None
+                done, _ = await asyncio.wait(set(tasks), timeout=hedge_after)
+                error = next(iter(done)).exception() if done else None
+                if isinstance(error, AdmissionRejected):
+                    raise error  # never admitted: a fallback would only queue behind the same limit
+                primary_failed = error is not None
+                if not done and ROUTING_HEDGING_ENABLED and not llm_admission.has_free_slot:
+                    # A hedge is extra load; only send one if a slot is free right now
+                    decision["hedge_skipped"] = True
+                elif (not done and ROUTING_HEDGING_ENABLED) or primary_failed:
+                    # Either the primary is slower than usual (hedge) or it already failed (failover)
+                    decision["hedged"] = not done
+                    decision["failover"] = primary_failed
+                    if not done:
+                        decision["hedge_after_s"] = round(hedge_after, 3)
+                    hedge = asyncio.create_task(self._run(fallback, system_message, prompt, max_tokens, task_type))
+                    tasks[hedge] = fallback
+
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        decision["winner"] = tasks[task]
+                        decision["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                        return task.result()
+                    last_error = task.exception()
+            decision["error"] = str(last_error)
+            raise last_error
+        finally:
+            # Cancel whichever call lost (or everything, if we were cancelled ourselves)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_model: Dict[str, Dict[str, Any]] = {}
+        for (model, task_type), stats in sorted(self.stats.items()):
+            by_model.setdefault(model, {})[task_type] = stats.snapshot()
+        return by_model
+
+model_router = ModelRouter()
+
 class LLMCloner:
     """Advanced LLM cloning with multiple models and reasoning chains"""
     
     MODELS = {
         "gpt-4o": "gpt-4o",
+        "gpt-4o-mini": "gpt-4o-mini",
         "gpt-4-turbo": "gpt-4-turbo",
         "gpt-3.5-turbo": "gpt-3.5-turbo",
         # Gemini models:
@@ -500,8 +1807,16 @@ class LLMCloner:
         return truncated
 
     @staticmethod
-    async def clone_with_reasoning_chain(design_context: DesignContext, model: str = "gpt-4o") -> str:
-        """Use a multi-step reasoning chain approach for better cloning"""
+    async def clone_with_reasoning_chain(design_context: DesignContext, model: str = "gpt-4o",
+                                         generation_mode: str = "single",
+                                         report: Optional[Dict[str, Any]] = None) -> str:
+        """Use a multi-step reasoning chain approach for better cloning
+
+        ``generation_mode="sections"`` replaces the single final HTML call with one
+        call for the shared <head> plus one concurrent call per page section.
+        Details of how the page was generated are written into ``report``.
+        """
+        report = report if report is not None else {}
         
         # Convert design context to dict and truncate
         context_dict = design_context.dict()
@@ -581,6 +1896,12 @@ class LLMCloner:
         
         style_variations = await LLMCloner._call_llm(style_prompt, model, "style")
         
+        if generation_mode == "sections":
+            return await LLMCloner._generate_by_sections(
+                design_context, truncated_context, content_variations, style_variations, model, report
+            )
+        report["generation_mode"] = "single"
+        
         # Step 4: Generate final HTML
         final_prompt = f"""
 You are an expert web developer and designer. Your task is to generate a complete, visually accurate HTML clone of the website at this exact URL, using only the design context below.
@@ -628,7 +1949,236 @@ Generate the HTML now:
         return cleaned_html
     
     @staticmethod
-    async def _call_llm(prompt: str, model: str, task_type: str) -> str:
+    def _plan_sections(design_context: DesignContext) -> List[Dict[str, Any]]:
+        """Pick the page blocks to generate independently, in document order
+
+        Top-level blocks become units, landmarks or not, except a <main> that
+        contains its own blocks: those become units and <main> is rebuilt around
+        them. Contexts without layout sections fall back to the top-level children
+        of the simplified DOM.
+        """
+        sections = design_context.layout_info.get('sections', [])
+        wrappers = {i for i, s in enumerate(sections) if s.get('tag') == 'main' and
+                    any(other.get('parent') == 'main' for other in sections)}
+        units = []
+        for i, section in enumerate(sections):
+            if i in wrappers:
+                continue
+            if section.get('parent') in ('', None) or section.get('parent') == 'main':
+                units.append({**section, 'in_main': section.get('parent') == 'main'})
+        if not units:
+            for child in design_context.dom_structure.get('children', []):
+                if child.get('tag') not in (None, 'text', 'truncated', 'script'):
+                    units.append({'tag': child['tag'], 'class': child.get('class', ''),
+                                  'id': child.get('id', ''), 'in_main': False, 'dom': child})
+        return units
+
+    @staticmethod
+    def _find_dom_node(node: Dict[str, Any], unit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Depth-first search for the simplified DOM node matching a section's tag/class/id
+        if (node.get('tag') == unit.get('tag') and node.get('class', '') == unit.get('class', '')
+                and node.get('id', '') == unit.get('id', '')):
+            return node
+        for child in node.get('children', []):
+            found = LLMCloner._find_dom_node(child, unit)
+            if found:
+                return found
+        return None
+
+    @staticmethod
+    def _strip_code_fences(text: str) -> str:
+        text = text.strip()
+        if text.startswith("```"):
+            text = re.sub(r"^```[a-zA-Z]*\s*", "", text)
+            text = re.sub(r"\s*```$", "", text)
+        return text
+
+    @staticmethod
+    def _validate_fragment(text: str, part: str) -> Optional[str]:
+        """Return the usable markup from an LLM reply, or None if it has no elements
+
+        ``part`` is "head" or "body"; full documents are unwrapped to that part so
+        stitching never nests <html> inside <body>.
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(LLMCloner._strip_code_fences(text), 'html.parser')
+        container = soup.find(part)
+        if container is None:
+            # A bare fragment: drop whatever belongs to the other part and unwrap <html>
+            for tag in soup.find_all('body' if part == 'head' else 'head'):
+                tag.decompose()
+            for tag in soup.find_all('html'):
+                tag.unwrap()
+            container = soup
+        if not container.find(True):
+            return None
+        return container.decode_contents()
+
+    @staticmethod
+    def _fallback_section(unit: Dict[str, Any]) -> str:
+        # Deterministic stand-in so one failed section never fails the whole clone
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup("", 'html.parser')
+        tag = soup.new_tag(unit.get('tag') if unit.get('tag') in ('header', 'nav', 'section', 'aside', 'footer') else 'section')
+        if unit.get('class'):
+            tag['class'] = unit['class']
+        if unit.get('id'):
+            tag['id'] = unit['id']
+        for heading in unit.get('headings', [])[:2]:
+            h = soup.new_tag('h2')
+            h.string = heading
+            tag.append(h)
+        if unit.get('text'):
+            p = soup.new_tag('p')
+            p.string = unit['text']
+            tag.append(p)
+        return str(tag)
+
+    @staticmethod
+    async def _generate_part(prompt: str, model: str, task_type: str, part: str,
+                             max_tokens: int, cache_basis: str) -> Optional[str]:
+        """One cached, validated, retried LLM call for the head or a single section
+
+        The cache key comes from ``cache_basis`` (the part's own scraped context)
+        rather than the prompt, because the prompt also carries LLM-generated
+        variations that differ on every run.
+        """
+        key = hashlib.sha256(f"{model}\0{task_type}\0{cache_basis}".encode("utf-8")).hexdigest()
+        if key in section_cache:
+            return section_cache[key]
+        for attempt in range(SECTION_MAX_ATTEMPTS):
+            try:
+                reply = await LLMCloner._call_llm(prompt, model, task_type, max_tokens=max_tokens)
+            except AdmissionRejected:
+                raise
+            except HTTPException as e:
+                logger.warning(f"{task_type} generation attempt {attempt + 1} failed: {e.detail}")
+                continue
+            fragment = LLMCloner._validate_fragment(reply, part)
+            if fragment:
+                section_cache[key] = fragment
+                return fragment
+            logger.warning(f"{task_type} generation attempt {attempt + 1} returned no usable markup")
+        return None
+
+    @staticmethod
+    async def _generate_by_sections(design_context: DesignContext, truncated_context: Dict[str, Any],
+                                    content_variations: str, style_variations: str, model: str,
+                                    report: Dict[str, Any]) -> str:
+        """Generate the shared <head> once and every section concurrently, then stitch"""
+        units = LLMCloner._plan_sections(design_context)
+        unplanned = list(design_context.layout_info.get('unplanned', []))
+        dropped = max(0, len(units) - SECTION_MAX_UNITS)
+        if dropped:
+            # Keep the closing block (usually the footer) so the page still ends properly
+            unplanned.extend({'tag': u['tag'], 'id': u.get('id', ''), 'parent': u.get('parent', ''),
+                              'text': u.get('text', '')[:100]} for u in units[SECTION_MAX_UNITS - 1:-1])
+            units = units[:SECTION_MAX_UNITS - 1] + units[-1:]
+        outline = [{'tag': u['tag'], 'class': u.get('class', ''), 'id': u.get('id', '')} for u in units]
+
+        head_prompt = f"""
+Write ONLY the inner contents of the <head> element for a clone of the website below: meta tags,
+<title>, any Google Fonts <link> tags and ONE <style> block with all the CSS the page needs.
+The body will be generated separately, section by section, using these blocks (keep their classes/ids):
+{json.dumps(outline, indent=2)}
+
+Title: {truncated_context['title']}
+Description: {truncated_context['description']}
+Color Palette: {truncated_context['color_palette']}
+Typography: {json.dumps(truncated_context['typography'], indent=2)}
+
+**CSS Contents:**
+{chr(10).join(truncated_context['css_contents'])}
+
+**Style Variations:**
+{style_variations}
+
+Do NOT include <html>, <body>, explanations or Markdown.
+"""
+
+        head_basis = json.dumps([outline, truncated_context['title'], truncated_context['color_palette'],
+                                 truncated_context['typography'], truncated_context['css_contents']])
+
+        def section_context(unit: Dict[str, Any]):
+            # Only this section's slice of the context, so prompts stay small and independent
+            dom = unit.get('dom') or LLMCloner._find_dom_node(design_context.dom_structure, unit) or {}
+            images = [img for img in design_context.images if img.get('src') in unit.get('images', [])]
+            return dom, images
+
+        def section_prompt(index: int, unit: Dict[str, Any]) -> str:
+            dom, images = section_context(unit)
+            return f"""
+Write ONLY the HTML for block {index + 1} of {len(units)} of a website clone: a single <{unit['tag']}> element
+with class="{unit.get('class', '')}" id="{unit.get('id', '')}" and its contents. The shared CSS is
+already in the <head>; use inline style="" only for details it cannot cover.
+
+Page title: {truncated_context['title']}
+Page outline (for context only, do NOT generate other blocks): {json.dumps(outline)}
+
+**This block's original content:**
+Headings: {json.dumps(unit.get('headings', []))}
+Text: {unit.get('text', '')}
+DOM Structure: {json.dumps(dom, indent=2)[:LLMCloner.MAX_LIMITS['dom_structure']]}
+Images: {json.dumps(images, indent=2)}
+
+**Content Variations (use the parts that belong to this block):**
+{content_variations[:SECTION_CONTENT_CHARS]}
+
+Do NOT include <html>, <head>, <body>, explanations or Markdown.
+"""
+
+        tasks = [asyncio.create_task(LLMCloner._generate_part(head_prompt, model, "head", "head",
+                                                              SECTION_HEAD_MAX_TOKENS, head_basis))]
+        tasks.extend(
+            asyncio.create_task(LLMCloner._generate_part(
+                section_prompt(i, unit), model, "section", "body", SECTION_MAX_TOKENS,
+                json.dumps([i, outline, unit, section_context(unit)], default=str)))
+            for i, unit in enumerate(units)
+        )
+        try:
+            head, *fragments = await asyncio.gather(*tasks)
+        finally:
+            # A part that raises (e.g. a 429 from the LLM queue) fails the clone, so stop the rest
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Stitch in document order; sections that lived inside <main> go back inside one
+        body_parts: List[str] = []
+        main_parts: List[str] = []
+        fallbacks = 0
+        for unit, fragment in zip(units, fragments):
+            if fragment is None:
+                fallbacks += 1
+                fragment = LLMCloner._fallback_section(unit)
+            if unit.get('in_main'):
+                main_parts.append(fragment)
+                continue
+            if main_parts:
+                body_parts.append("<main>" + "\n".join(main_parts) + "</main>")
+                main_parts = []
+            body_parts.append(fragment)
+        if main_parts:
+            body_parts.append("<main>" + "\n".join(main_parts) + "</main>")
+
+        report.update({
+            "generation_mode": "sections",
+            "sections": len(units),
+            "sections_dropped": dropped,
+            "section_fallbacks": fallbacks,
+            "head_fallback": head is None,
+            "section_plan": {"units": outline, "unplanned": unplanned},
+        })
+        head = head or f"<title>{html_escape(design_context.title)}</title>"
+        document = (f"<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n{head}\n</head>\n"
+                    f"<body>\n{chr(10).join(body_parts)}\n</body>\n</html>")
+        return LLMCloner._clean_html_response(document)
+
+    @staticmethod
+    async def _call_llm(prompt: str, model: str, task_type: str, max_tokens: Optional[int] = None) -> str:
         """Enhanced LLM call with better error handling and response processing"""
         try:
             # Add task-specific system message
@@ -637,7 +2187,9 @@ Generate the HTML now:
                 "analysis": "You are a web design expert analyzing website structure and aesthetics.",
                 "content": "You are a content strategist creating unique variations of web content.",
                 "style": "You are a UI/UX designer creating modern, accessible design variations.",
-                "html": "You are a frontend developer creating semantic, responsive HTML structures."
+                "html": "You are a frontend developer creating semantic, responsive HTML structures.",
+                "head": "You are a frontend developer writing the shared <head> and stylesheet for a page.",
+                "section": "You are a frontend developer building one section of a larger, semantic, responsive page."
             }
             
             system_message = system_messages.get(task_type, "You are an AI assistant helping with website cloning.")
@@ -648,7 +2200,9 @@ Generate the HTML now:
                 "analysis": "Provide a detailed, structured analysis of the website design.",
                 "content": "Generate unique content variations while maintaining the original structure.",
                 "style": "Create style variations that maintain the original aesthetic.",
-                "html": "Generate clean, semantic HTML with all necessary elements."
+                "html": "Generate clean, semantic HTML with all necessary elements.",
+                "head": "Generate only the <head> contents, with all page CSS in a single <style> block.",
+                "section": "Generate only the requested section's HTML, consistent with the shared CSS."
             }
             
             # Truncate the prompt if it's too long
@@ -658,44 +2212,13 @@ Generate the HTML now:
             
             full_prompt = f"{system_message}\n\n{task_instructions[task_type]}\n\n{prompt}"
             
-            # Make API call with retry mechanism
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    if model.startswith("gemini"):
-                        # Use Gemini model
-                        gemini_model = genai.GenerativeModel(model)
-                        # Configure the model with safety settings
-                        generation_config = {
-                            "temperature": 0.7,
-                            "top_p": 0.8,
-                            "top_k": 40,
-                            "max_output_tokens": 2048,
-                        }
-                        # Create the chat session
-                        chat = gemini_model.start_chat(history=[])
-                        # Add system message as the first message
-                        chat.send_message(system_message)
-                        # Send the actual prompt
-                        response = await chat.send_message_async(full_prompt)
-                        return response.text
-                    else:
-                        # Use OpenAI model
-                        response = await openai.ChatCompletion.acreate(
-                            model=model,
-                            messages=[
-                                {"role": "system", "content": system_message},
-                                {"role": "user", "content": full_prompt}
-                            ],
-                            temperature=0.7,
-                            max_tokens=2000
-                        )
-                        return response.choices[0].message.content
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise e
-                    await asyncio.sleep(1)
+            # The router picks the model for this task type and hedges slow calls, taking an
+            # LLM admission slot per call; providers own the long-lived clients, retries and
+            # concurrency limits
+            return await model_router.generate(model, task_type, system_message, full_prompt, max_tokens)
             
+        except AdmissionRejected:
+            raise
         except Exception as e:
             logger.error(f"Error in LLM call: {str(e)}")
             raise HTTPException(
@@ -707,6 +2230,8 @@ Generate the HTML now:
     def _clean_html_response(html: str) -> str:
         """Clean and validate the generated HTML"""
         try:
+            from bs4 import BeautifulSoup
+
             # Parse HTML
             soup = BeautifulSoup(html, 'html.parser')
             
@@ -767,6 +2292,364 @@ Generate the HTML now:
             logger.error(f"Error cleaning HTML: {str(e)}")
             return html
 
+# Asset mirroring settings (override from the environment)
+ASSET_STORE_DIR = os.getenv("ASSET_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_store"))
+ASSET_MIRROR_CONCURRENCY = int(os.getenv("ASSET_MIRROR_CONCURRENCY", "8"))
+ASSET_MIRROR_MAX_PER_REQUEST = int(os.getenv("ASSET_MIRROR_MAX_PER_REQUEST", "100"))
+ASSET_MAX_BYTES = int(os.getenv("ASSET_MAX_BYTES", str(5 * 1024 * 1024)))  # per asset
+ASSET_STORE_MAX_BYTES = int(os.getenv("ASSET_STORE_MAX_BYTES", str(500 * 1024 * 1024)))  # whole store
+ASSET_MIRROR_TYPES = {t.strip() for t in os.getenv("ASSET_MIRROR_TYPES", "image,font,css").split(",") if t.strip()}
+ASSET_PUBLIC_BASE_URL = os.getenv("ASSET_PUBLIC_BASE_URL")  # defaults to the URL the API was called on
+ASSET_CSS_MAX_DEPTH = 2  # levels of stylesheet references (@import chains) mirrored along with a sheet
+
+FONT_EXTENSIONS = (".woff2", ".woff", ".ttf", ".otf", ".eot")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp")
+GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream")  # say nothing about the asset
+ASSET_ID_RE = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$")
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+CSS_IMPORT_RE = re.compile(r"""(@import\s+)(['"])([^'"]+)\2""", re.IGNORECASE)
+
+class AssetStore:
+    """Content-addressed on-disk store for assets referenced by cloned pages
+
+    Files are named ``<sha256><ext>``, so the same image linked from many sites
+    (or many clones of one site) is written once.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        # Remember which URL produced which file so repeat clones skip the download
+        self._url_index = TTLCache(maxsize=10000, ttl=3600)
+        self._total_bytes: Optional[int] = None
+        self._size_lock = asyncio.Lock()
+
+    @staticmethod
+    def classify(url: str, content_type: str = "", initiator: str = "") -> Optional[str]:
+        """Bucket an asset into image/font/css, or None for things we never mirror
+
+        A specific Content-Type wins over the URL: an HTML soft-404 served at
+        ``/logo.png`` is not an image. The extension and initiator only count
+        when the type is missing or generic.
+        """
+        content_type = content_type.split(";")[0].strip().lower()
+        if content_type not in GENERIC_CONTENT_TYPES:
+            if content_type.startswith("image/"):
+                return "image"
+            if content_type.startswith("font/") or "font" in content_type:
+                return "font"
+            return "css" if content_type == "text/css" else None
+        path = urlparse(url).path.lower()
+        if path.endswith(IMAGE_EXTENSIONS) or initiator == "img":
+            return "image"
+        if path.endswith(FONT_EXTENSIONS):
+            return "font"
+        if path.endswith(".css"):
+            return "css"
+        return None
+
+    def path_for(self, asset_id: str) -> Optional[str]:
+        if not ASSET_ID_RE.match(asset_id):
+            return None
+        path = os.path.join(self.root, asset_id)
+        return path if os.path.isfile(path) else None
+
+    def _scan_size(self) -> int:
+        os.makedirs(self.root, exist_ok=True)
+        return sum(entry.stat().st_size for entry in os.scandir(self.root) if entry.is_file())
+
+    async def _reserve(self, size: int) -> bool:
+        """Claim ``size`` bytes of the store's budget; False if it would go over ASSET_STORE_MAX_BYTES
+
+        Reserving before the write keeps concurrent downloads from all passing
+        the check and overshooting the cap together.
+        """
+        async with self._size_lock:
+            if self._total_bytes is None:
+                self._total_bytes = await asyncio.to_thread(self._scan_size)
+            if self._total_bytes + size > ASSET_STORE_MAX_BYTES:
+                return False
+            self._total_bytes += size
+            return True
+
+    def _write(self, data: bytes, asset_id: str) -> bool:
+        """Write a blob unless it already exists; returns True if new bytes hit the disk"""
+        path = os.path.join(self.root, asset_id)
+        if os.path.exists(path):
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def _css_reference_urls(text: str, sheet_url: str) -> Dict[str, str]:
+        """Absolute URL -> asset type for the url() and @import targets of a stylesheet"""
+        references: Dict[str, str] = {}
+        for raw_url, asset_type in ([(m.group(2), None) for m in CSS_URL_RE.finditer(text)]
+                                    + [(m.group(3), "css") for m in CSS_IMPORT_RE.finditer(text)]):
+            raw_url = raw_url.strip()
+            if not raw_url or raw_url.startswith(("data:", "#")):
+                continue
+            absolute = urljoin(sheet_url, raw_url)
+            asset_type = asset_type or AssetStore.classify(absolute)
+            if urlparse(absolute).scheme in ("http", "https") and asset_type in ASSET_MIRROR_TYPES:
+                references.setdefault(absolute, asset_type)
+        return references
+
+    @staticmethod
+    def rewrite_css_references(css: bytes, sheet_url: str, mirrored: Dict[str, str]) -> bytes:
+        """Make a stylesheet's url() and @import references work from /assets/
+
+        References that were mirrored as well become bare asset ids, which
+        resolve next to the sheet; everything else is resolved against the
+        sheet's original URL.
+        """
+        # latin-1 maps every byte to one character, so bytes we don't touch round-trip exactly
+        text = css.decode("latin-1")
+
+        def resolve(raw_url: str) -> str:
+            raw_url = raw_url.strip()
+            if not raw_url or raw_url.startswith(("data:", "#")):
+                return raw_url
+            absolute = urljoin(sheet_url, raw_url)
+            return mirrored.get(absolute, absolute)
+
+        text = CSS_URL_RE.sub(lambda m: f"url({m.group(1)}{resolve(m.group(2))}{m.group(1)})", text)
+        text = CSS_IMPORT_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}{resolve(m.group(3))}{m.group(2)}", text)
+        return text.encode("latin-1")
+
+    async def _download(self, url: str, asset_type: str, semaphore: asyncio.Semaphore,
+                        depth: int = 0) -> Optional[str]:
+        if url in self._url_index:
+            return self._url_index[url]
+        async with semaphore:
+            try:
+                client = get_proxy_client()
+                async with client.stream("GET", url) as resp:
+                    if resp.status_code != 200:
+                        return None
+                    content_type = resp.headers.get("content-type", "")
+                    # Trust the server over the URL: skip anything outside the allowed types
+                    actual_type = self.classify(url, content_type)
+                    if actual_type is None and content_type.split(";")[0].strip().lower() in GENERIC_CONTENT_TYPES:
+                        actual_type = asset_type
+                    if actual_type not in ASSET_MIRROR_TYPES:
+                        return None
+                    declared = int(resp.headers.get("content-length") or 0)
+                    if declared > ASSET_MAX_BYTES:
+                        return None
+                    chunks = []
+                    size = 0
+                    async for chunk in resp.aiter_bytes():
+                        size += len(chunk)
+                        if size > ASSET_MAX_BYTES:
+                            logger.info(f"Skipping {url}: larger than {ASSET_MAX_BYTES} bytes")
+                            return None
+                        chunks.append(chunk)
+                    final_url = str(resp.url)
+            except Exception as e:
+                logger.warning(f"Failed to mirror asset {url}: {e}")
+                return None
+
+        data = b"".join(chunks)
+        if actual_type == "css":
+            # Relative references would resolve against /assets/ now: mirror what they point at
+            # (fonts, backgrounds, a level or two of @import) and resolve the rest against the
+            # sheet's real URL, after redirects
+            mirrored: Dict[str, str] = {}
+            if depth < ASSET_CSS_MAX_DEPTH:
+                references = self._css_reference_urls(data.decode("latin-1"), final_url)
+                targets = list(references)[:ASSET_MIRROR_MAX_PER_REQUEST]
+                results = await asyncio.gather(*(self._download(target, references[target], semaphore, depth + 1)
+                                                 for target in targets))
+                mirrored = {target: asset_id for target, asset_id in zip(targets, results) if asset_id}
+            data = self.rewrite_css_references(data, final_url, mirrored)
+            size = len(data)
+        digest = hashlib.sha256(data)
+
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if not re.match(r"^\.[a-z0-9]{1,8}$", ext):
+            ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+        asset_id = digest.hexdigest() + ext
+        if self.path_for(asset_id) is None:
+            if not await self._reserve(size):
+                logger.warning(f"Asset store full ({ASSET_STORE_MAX_BYTES} bytes), not mirroring {url}")
+                return None
+            written = False
+            try:
+                written = await asyncio.to_thread(self._write, data, asset_id)
+            finally:
+                if not written:
+                    # Someone else stored the same blob first (or the write failed): give the bytes back
+                    self._total_bytes -= size
+        if actual_type != "css" or depth < ASSET_CSS_MAX_DEPTH:
+            # A sheet at the depth limit kept its references remote; don't reuse it for shallower requests
+            self._url_index[url] = asset_id
+        return asset_id
+
+    @staticmethod
+    def collect_urls(design_context: DesignContext, page_url: str) -> Dict[str, str]:
+        """Absolute URL -> asset type for every mirrorable image, font and stylesheet"""
+        candidates: Dict[str, str] = {}
+
+        def add(raw_url: str, asset_type: Optional[str]):
+            if not raw_url or raw_url.startswith(("data:", "blob:", "javascript:")):
+                return
+            absolute = urljoin(page_url, raw_url)
+            if urlparse(absolute).scheme in ("http", "https") and asset_type in ASSET_MIRROR_TYPES:
+                candidates.setdefault(absolute, asset_type)
+
+        for image in design_context.images:
+            add(image.get("src", ""), "image")
+        # Font families are just names; the font files themselves show up as network assets
+        for asset in design_context.assets:
+            add(asset.get("url", ""), AssetStore.classify(asset.get("url", ""), initiator=asset.get("type", "")))
+        for stylesheet in design_context.stylesheets:
+            add(stylesheet, "css")
+        return dict(list(candidates.items())[:ASSET_MIRROR_MAX_PER_REQUEST])
+
+    async def mirror(self, design_context: DesignContext, page_url: str) -> Dict[str, str]:
+        """Download everything the clone may reference; returns absolute URL -> asset id"""
+        candidates = self.collect_urls(design_context, page_url)
+        semaphore = asyncio.Semaphore(ASSET_MIRROR_CONCURRENCY)
+        urls = list(candidates)
+        results = await asyncio.gather(*(self._download(url, candidates[url], semaphore) for url in urls))
+        return {url: asset_id for url, asset_id in zip(urls, results) if asset_id}
+
+    @staticmethod
+    def rewrite_html(html: str, page_url: str, mapping: Dict[str, str], public_base: str) -> str:
+        """Point src/href/srcset and CSS url() references at the local /assets endpoint"""
+        if not mapping:
+            return html
+
+        def local(raw_url: str) -> Optional[str]:
+            asset_id = mapping.get(urljoin(page_url, raw_url.strip()))
+            return f"{public_base}/assets/{asset_id}" if asset_id else None
+
+        def rewrite_css(css: str) -> str:
+            def replace(match):
+                target = local(match.group(2))
+                return f"url({match.group(1)}{target}{match.group(1)})" if target else match.group(0)
+            return CSS_URL_RE.sub(replace, css)
+
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup.find_all(True):
+            for attr in ("src", "href", "poster", "data-src"):
+                value = tag.get(attr)
+                if isinstance(value, str) and local(value):
+                    tag[attr] = local(value)
+            for attr in ("srcset", "data-srcset"):
+                value = tag.get(attr)
+                if isinstance(value, str):
+                    parts = []
+                    for candidate in value.split(","):
+                        pieces = candidate.strip().split(None, 1)
+                        if pieces and local(pieces[0]):
+                            pieces[0] = local(pieces[0])
+                        parts.append(" ".join(pieces))
+                    tag[attr] = ", ".join(parts)
+            if tag.get("style"):
+                tag["style"] = rewrite_css(tag["style"])
+        for style in soup.find_all("style"):
+            if style.string:
+                style.string = rewrite_css(style.string)
+        return str(soup)
+
+asset_store = AssetStore(ASSET_STORE_DIR)
+
+# Page snapshots (compact msgpack/zstd copies of fetch_page_data output) and their replays.
+# A replay fans out over a process pool already, so run one at a time.
+snapshot_store = snapshots.SnapshotStore(snapshots.SNAPSHOT_DIR)
+replay_admission = AdmissionController("snapshot replay", 1, queue_size=4)
+
+# Start-up warm-up settings (override from the environment)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "0") == "1"
+WARMUP_STEP_TIMEOUT = float(os.getenv("WARMUP_STEP_TIMEOUT", "60"))  # seconds per step
+
+class Warmup:
+    """Start-up work run in the background by the lifespan, and the state /ready reports
+
+    Restoring a persisted response cache runs whenever CACHE_PERSIST_PATH is set.
+    With WARMUP_ON_STARTUP=1 the worker also launches its browser and opens
+    connections to every LLM provider that has an API key, so the first real
+    request doesn't pay for them. Steps run concurrently; a failed step is
+    reported but doesn't keep the worker out of rotation.
+    """
+
+    def __init__(self):
+        self.status = "pending"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.duration_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("done", "degraded", "disabled")
+
+    def _plan(self) -> Dict[str, Any]:
+        steps = {}
+        if CACHE_PERSIST_PATH:
+            steps["cache"] = lambda: restore_persisted_cache(CACHE_PERSIST_PATH)
+        if WARMUP_ON_STARTUP:
+            steps["browser"] = browser_manager.warm
+            for provider, env_key in ModelRouter.PROVIDER_KEYS.items():
+                if os.getenv(env_key):
+                    steps[f"llm.{provider}"] = llm_providers.get(provider).warm
+        return steps
+
+    async def _step(self, name: str, step):
+        start = time.perf_counter()
+        self.steps[name] = {"status": "running"}
+        try:
+            result = await asyncio.wait_for(step(), timeout=WARMUP_STEP_TIMEOUT)
+            self.steps[name] = {"status": "done"}
+            if isinstance(result, int):
+                self.steps[name]["entries"] = result
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e!r}")
+            self.steps[name] = {"status": "failed", "error": repr(e)}
+        self.steps[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def run(self):
+        steps = self._plan()
+        if not steps:
+            self.status = "disabled"
+            return
+        self.status = "running"
+        start = time.perf_counter()
+        await asyncio.gather(*(self._step(name, step) for name, step in steps.items()))
+        self.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        failed = [name for name, step in self.steps.items() if step["status"] == "failed"]
+        self.status = "degraded" if failed else "done"
+        logger.info(f"Warm-up finished in {self.duration_ms}ms ({self.status})")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "steps": self.steps,
+            "browser": browser_manager.snapshot(),
+        }
+
+warmup = Warmup()
+
 # API Endpoints
 
 @app.get("/")
@@ -779,7 +2662,9 @@ async def root():
         "endpoints": {
             "/clone": "Clone a website with AI-powered content variation",
             "/analyze": "Analyze a website's design and structure",
-            "/models": "Get available AI models"
+            "/models": "Get available AI models",
+            "/ready": "Readiness probe reporting start-up warm-up state",
+            "/snapshots": "Capture, list and replay saved page snapshots"
         }
     }
 
@@ -789,31 +2674,84 @@ async def get_available_models():
     return {
         "models": list(LLMCloner.MODELS.keys()),
         "default": "gpt-4o",
-        "recommended": ["gpt-4o", "gpt-4-turbo"]
+        "recommended": ["gpt-4o", "gpt-4-turbo"],
+        "routing": {
+            "task_tiers": ModelRouter.TASK_TIERS,
+            "stats": model_router.snapshot()
+        }
     }
 
+@app.get("/admission")
+async def get_admission_stats():
+    """Concurrency, queue depth and wait times for browser and LLM capacity"""
+    return {
+        "scrape": scrape_admission.snapshot(),
+        "llm": llm_admission.snapshot()
+    }
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 503 until start-up warm-up has finished"""
+    state = warmup.snapshot()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=state)
+    return state
+
 @app.post("/clone")
-async def clone_website(request: CloneRequest):
+async def clone_website(request: CloneRequest, http_request: Request,
+                        memory: MemoryWatermark = Depends(track_memory)):
     """Clone a website with AI-powered content variation"""
     try:
         # Check cache first
-        cache_key = f"clone_{request.url}_{request.model}_{request.include_images}_{request.include_styles}"
-        if cache_key in cache:
+        cache_key = (f"clone_{request.url}_{request.model}_{request.include_images}_{request.include_styles}"
+                     f"_{request.mirror_assets}_{request.generation_mode}_{request.auto_route}_{request.save_snapshot}")
+        cached = cache.get(cache_key)
+        if cached is not None:
             logger.info(f"Returning cached result for {request.url}")
-            return cache[cache_key]
+            return cached.respond(http_request)
+        routing = {"enabled": request.auto_route, "decisions": []}
+        routing_context.set(routing)
+        request_priority.set(PRIORITY_CLONE)
         
-        # Fetch and analyze the website
+        # Fetch and analyze the website (queued behind the browser concurrency limit)
         logger.info(f"Fetching website data from {request.url}")
-        page_data = await WebScraper.fetch_page_data(str(request.url))
+        page_data = await WebScraper.scrape(str(request.url))
+        snapshot_id = None
+        if request.save_snapshot:
+            snapshot_id = (await asyncio.to_thread(snapshot_store.save, page_data, str(request.url)))["id"]
         
         # Extract design context
         logger.info("Extracting design context")
-        design_context = WebScraper.extract_design_context(page_data['html'], page_data)
-        logger.info(f"Extracted design context: {design_context.dict()}")
+        # Parsing is CPU-bound; run it in a thread so cache hits aren't stuck behind it
+        design_context = await asyncio.to_thread(WebScraper.extract_design_context, page_data['html'], page_data)
+        logger.info(f"Extracted design context: {design_context.title!r}, "
+                    f"{len(design_context.full_html)} HTML chars, limits hit: {design_context.limits_hit}")
+        
+        # Optionally pull the page's assets into our own store; this only needs the design
+        # context, so it runs while the clone is generated
+        mirror_task = None
+        if request.mirror_assets:
+            logger.info("Mirroring assets into the local store")
+            mirror_task = asyncio.create_task(asset_store.mirror(design_context, str(request.url)))
         
         # Generate cloned version with AI
         logger.info(f"Generating cloned version using model: {request.model}")
-        cloned_html = await LLMCloner.clone_with_reasoning_chain(design_context, request.model)
+        generation_report: Dict[str, Any] = {}
+        try:
+            cloned_html = await LLMCloner.clone_with_reasoning_chain(
+                design_context, request.model, request.generation_mode, generation_report
+            )
+        except BaseException:
+            if mirror_task is not None:
+                mirror_task.cancel()
+            raise
+        
+        # Point the clone at the mirrored copies
+        mirrored_assets = {}
+        if mirror_task is not None:
+            mirrored_assets = await mirror_task
+            public_base = (ASSET_PUBLIC_BASE_URL or str(http_request.base_url)).rstrip('/')
+            cloned_html = AssetStore.rewrite_html(cloned_html, str(request.url), mirrored_assets, public_base)
         
         # Prepare response
         response = {
@@ -828,15 +2766,25 @@ async def clone_website(request: CloneRequest):
                 "content_elements": len(design_context.content_structure),
                 "colors": len(design_context.color_palette),
                 "images": len(design_context.images),
-                "stylesheets": len(design_context.stylesheets)
+                "stylesheets": len(design_context.stylesheets),
+                "mirrored_assets": len(mirrored_assets),
+                "limits_hit": design_context.limits_hit,
+                "memory": memory.report(),
+                "generation": generation_report,
+                "sections": generation_report.pop("section_plan", None),
+                "routing": routing["decisions"],
+                "snapshot": snapshot_id
             }
         }
         
-        # Cache the result
-        cache[cache_key] = response
+        # Cache the result, encoded once so hits are served as raw bytes
+        cached = await asyncio.to_thread(CachedResponse.build, response)
+        cache_response(cache_key, cached)
         
-        return response
+        return cached.respond(http_request)
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error cloning website: {str(e)}")
         raise HTTPException(
@@ -844,24 +2792,94 @@ async def clone_website(request: CloneRequest):
             detail=f"Failed to clone website: {str(e)}"
         )
 
+@app.api_route("/results/{result_id}", methods=["GET", "HEAD"])
+async def get_cached_result(result_id: str, http_request: Request):
+    """A cached /clone or /analyze result by id (see Content-Location), with ETag revalidation"""
+    cached = cached_results.get(result_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return cached.respond(http_request, conditional=True)
+
+@app.get("/assets/{asset_id}")
+async def get_mirrored_asset(asset_id: str):
+    """Serve a mirrored asset by content hash; the bytes never change, so cache forever"""
+    path = asset_store.path_for(asset_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return FileResponse(path, headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # Third-party SVG/CSS is served from our origin: never sniff it as something else, and
+        # if it's opened directly, sandbox it so embedded scripts can't act as this origin
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "sandbox",
+    })
+
+@app.get("/screenshots/{tileset_id}")
+async def get_screenshot_manifest(tileset_id: str):
+    """Tile set manifest: tiles top to bottom (with y offsets and URLs) plus the preview"""
+    manifest = await asyncio.to_thread(screenshot_store.manifest, tileset_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    return manifest
+
+@app.get("/screenshots/{tileset_id}/{name}")
+async def get_screenshot_tile(tileset_id: str, name: str):
+    """Serve one tile (or the preview); a tile set is written once, so cache until it expires"""
+    path = screenshot_store.path_for(tileset_id, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Screenshot tile not found")
+    return FileResponse(path, headers={"Cache-Control": f"public, max-age={SCREENSHOT_TTL}, immutable"})
+
+@app.get("/snapshots")
+async def list_snapshots():
+    """Saved page snapshots, oldest first"""
+    return {"snapshots": await asyncio.to_thread(snapshot_store.entries)}
+
+@app.post("/snapshots")
+async def capture_snapshot(request: CloneRequest):
+    """Scrape a page and save it as a snapshot, without running any LLM step"""
+    request_priority.set(PRIORITY_CLONE)
+    page_data = await WebScraper.scrape(str(request.url))
+    return await asyncio.to_thread(snapshot_store.save, page_data, str(request.url))
+
+@app.post("/snapshots/replay")
+async def replay_snapshots(request: ReplayRequest):
+    """Re-run extraction (or the whole clone pipeline) over snapshots in a process pool"""
+    processes = min(request.processes or snapshots.SNAPSHOT_REPLAY_PROCESSES, snapshots.SNAPSHOT_REPLAY_PROCESSES)
+    async with replay_admission.slot():
+        return await asyncio.to_thread(
+            snapshots.replay, request.snapshot_ids, request.mode, request.model,
+            request.generation_mode, processes, snapshot_store.root
+        )
+
 @app.post("/analyze")
-async def analyze_website(request: CloneRequest):
+async def analyze_website(request: CloneRequest, http_request: Request,
+                          memory: MemoryWatermark = Depends(track_memory)):
     """Analyze a website's design and structure"""
     try:
         # Check cache first
-        cache_key = f"analyze_{request.url}"
-        if cache_key in cache:
+        cache_key = f"analyze_{request.url}_{request.model}_{request.auto_route}_{request.save_snapshot}"
+        cached = cache.get(cache_key)
+        if cached is not None:
             logger.info(f"Returning cached analysis for {request.url}")
-            return cache[cache_key]
+            return cached.respond(http_request)
+        routing = {"enabled": request.auto_route, "decisions": []}
+        routing_context.set(routing)
+        request_priority.set(PRIORITY_ANALYZE)
         
-        # Fetch website data
+        # Fetch website data (queued behind the browser concurrency limit, ahead of /clone)
         logger.info(f"Fetching website data from {request.url}")
-        page_data = await WebScraper.fetch_page_data(str(request.url))
+        page_data = await WebScraper.scrape(str(request.url))
+        snapshot_id = None
+        if request.save_snapshot:
+            snapshot_id = (await asyncio.to_thread(snapshot_store.save, page_data, str(request.url)))["id"]
         
         # Extract design context
         logger.info("Extracting design context")
-        design_context = WebScraper.extract_design_context(page_data['html'], page_data)
-        logger.info(f"Extracted design context: {design_context.dict()}")
+        # Parsing is CPU-bound; run it in a thread so cache hits aren't stuck behind it
+        design_context = await asyncio.to_thread(WebScraper.extract_design_context, page_data['html'], page_data)
+        logger.info(f"Extracted design context: {design_context.title!r}, "
+                    f"{len(design_context.full_html)} HTML chars, limits hit: {design_context.limits_hit}")
         
         # Convert to dict and truncate
         context_dict = design_context.dict()
@@ -914,14 +2932,23 @@ Layout Info: {json.dumps(truncated_context['layout_info'], indent=2)}
             "url": str(request.url),
             "overview": overview,
             "analysis": analysis,
-            "design_context": design_context.dict()
+            "design_context": design_context.dict(),
+            "metadata": {
+                "limits_hit": design_context.limits_hit,
+                "memory": memory.report(),
+                "routing": routing["decisions"],
+                "snapshot": snapshot_id
+            }
         }
         
-        # Cache the result
-        cache[cache_key] = response
+        # Cache the result, encoded once so hits are served as raw bytes
+        cached = await asyncio.to_thread(CachedResponse.build, response)
+        cache_response(cache_key, cached)
         
-        return response
+        return cached.respond(http_request)
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing website: {str(e)}")
         raise HTTPException(
@@ -929,25 +2956,185 @@ Layout Info: {json.dumps(truncated_context['layout_info'], indent=2)}
             detail=f"Failed to analyze website: {str(e)}"
         )
 
+# Proxy settings for the comparison view (override from the environment)
+PROXY_TIMEOUT = float(os.getenv("PROXY_TIMEOUT", "15"))
+PROXY_MAX_CONNECTIONS = int(os.getenv("PROXY_MAX_CONNECTIONS", "50"))
+PROXY_CACHE_MAX_ENTRIES = int(os.getenv("PROXY_CACHE_MAX_ENTRIES", "64"))
+PROXY_CACHE_MAX_ENTRY_BYTES = int(os.getenv("PROXY_CACHE_MAX_ENTRY_BYTES", str(2 * 1024 * 1024)))
+PROXY_CACHE_MAX_TTL = int(os.getenv("PROXY_CACHE_MAX_TTL", "600"))  # seconds
+# How much of an HTML body we hold back while looking for <head> to inject <base>
+PROXY_HEAD_SCAN_BYTES = 64 * 1024
+
+# Headers we never pass through: frame blocking, hop-by-hop, and ones that
+# stop being true once httpx has decoded (and we may have rewritten) the body
+PROXY_DROP_HEADERS = {
+    "x-frame-options", "content-security-policy", "content-security-policy-report-only",
+    "connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+    "proxy-authenticate", "proxy-authorization", "content-encoding", "content-length",
+    "set-cookie", "strict-transport-security",
+}
+
+# Small cache of proxied responses; entries also carry their own expiry from Cache-Control
+proxy_cache = TTLCache(maxsize=PROXY_CACHE_MAX_ENTRIES, ttl=PROXY_CACHE_MAX_TTL)
+_proxy_client: Optional[httpx.AsyncClient] = None
+
+HEAD_TAG_RE = re.compile(rb"<head(\s[^>]*)?/?>", re.IGNORECASE)  # <head/> parses as a start tag too
+HTML_TAG_RE = re.compile(rb"<html(\s[^>]*)?>", re.IGNORECASE)
+DOCTYPE_RE = re.compile(rb"\A(\xef\xbb\xbf)?\s*<!doctype[^>]*>", re.IGNORECASE)
+BASE_TAG_RE = re.compile(rb"<base\s", re.IGNORECASE)
+
+def get_proxy_client() -> httpx.AsyncClient:
+    """Shared client so the proxy reuses connections (and TLS sessions) across requests"""
+    global _proxy_client
+    if _proxy_client is None:
+        _proxy_client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=PROXY_TIMEOUT,
+            limits=httpx.Limits(max_connections=PROXY_MAX_CONNECTIONS,
+                                max_keepalive_connections=PROXY_MAX_CONNECTIONS // 2),
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+        )
+    return _proxy_client
+
+async def close_proxy_client():
+    global _proxy_client
+    if _proxy_client is not None:
+        await _proxy_client.aclose()
+        _proxy_client = None
+
+def proxy_cache_ttl(headers) -> int:
+    """How long (seconds) a response may be cached according to its headers, 0 if not at all"""
+    if "set-cookie" in headers or headers.get("vary", "").strip() == "*":
+        return 0
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    if {"no-store", "no-cache", "private"} & directives.keys():
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0, min(int(directives[name]), PROXY_CACHE_MAX_TTL))
+            except ValueError:
+                return 0
+    expires = headers.get("expires")
+    if expires:
+        try:
+            delta = parsedate_to_datetime(expires).timestamp() - time.time()
+            return max(0, min(int(delta), PROXY_CACHE_MAX_TTL))
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+def inject_base_tag(head: bytes, base_url: str) -> bytes:
+    """Insert <base href> right after <head> so relative asset URLs resolve against the origin
+
+    Without a <head>, it goes after the <html> start tag, or the doctype, so
+    the document doesn't drop into quirks mode.
+    """
+    if BASE_TAG_RE.search(head):
+        # The page already declares its own base; leave it alone
+        return head
+    tag = f'<base href="{html_escape(base_url, quote=True)}">'.encode("utf-8")
+    match = HEAD_TAG_RE.search(head) or HTML_TAG_RE.search(head) or DOCTYPE_RE.search(head)
+    if match:
+        return head[:match.end()] + tag + head[match.end():]
+    return tag + head
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """Streams from an upstream httpx response and always closes it afterwards
+
+    The body generator alone can't guarantee that: if the client goes away
+    before iteration starts, it never runs, and Starlette skips background
+    tasks when a disconnect surfaces as an error.
+    """
+
+    def __init__(self, upstream: httpx.Response, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Hands the pooled connection back (or drops it if the body wasn't read to the end)
+            await self.upstream.aclose()
+
+def proxy_response_headers(upstream_headers, cache_status: str) -> Dict[str, str]:
+    headers = {k: v for k, v in upstream_headers.items() if k.lower() not in PROXY_DROP_HEADERS}
+    headers["X-Proxy-Cache"] = cache_status
+    return headers
+
 @app.get("/proxy")
 async def proxy_original_website(url: str):
-    """Proxy endpoint to fetch and serve the HTML of a target URL, removing frame-blocking headers."""
+    """Proxy endpoint that streams a target URL, removing frame-blocking headers and fixing relative URLs."""
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
         raise HTTPException(status_code=400, detail="Invalid URL scheme.")
+
+    # Serve from the local cache while the upstream said it was fresh
+    cached = proxy_cache.get(url)
+    if cached and cached["expires"] > time.time():
+        return Response(content=cached["body"], status_code=cached["status"],
+                        headers=proxy_response_headers(cached["headers"], "HIT"))
+
+    client = get_proxy_client()
     try:
-        async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
-            resp = await client.get(url)
-            content_type = resp.headers.get("content-type", "text/html")
-            # Remove frame-blocking headers if present
-            headers = dict(resp.headers)
-            headers.pop("x-frame-options", None)
-            headers.pop("content-security-policy", None)
-            return Response(content=resp.content, media_type=content_type)
+        upstream = await client.send(client.build_request("GET", url), stream=True)
     except Exception as e:
         logger.error(f"Proxy fetch failed: {e}")
         raise HTTPException(status_code=502, detail=f"Failed to fetch original website: {e}")
 
+    content_type = upstream.headers.get("content-type", "text/html")
+    is_html = "html" in content_type.lower()
+    ttl = proxy_cache_ttl(upstream.headers) if upstream.status_code == 200 else 0
+    # After redirects this is where relative URLs should resolve from
+    final_url = str(upstream.url)
+
+    async def body():
+        cache_chunks = [] if ttl else None
+        cached_size = 0
+        pending = b""
+        head_done = not is_html
+
+        def remember(chunk: bytes):
+            # Tee the stream into the cache buffer, giving up once it gets too big
+            nonlocal cache_chunks, cached_size
+            if cache_chunks is None:
+                return
+            cached_size += len(chunk)
+            if cached_size > PROXY_CACHE_MAX_ENTRY_BYTES:
+                cache_chunks = None
+            else:
+                cache_chunks.append(chunk)
+
+        async for chunk in upstream.aiter_bytes():
+            if not head_done:
+                # Hold the start of the document until we can place <base> after <head>
+                pending += chunk
+                if not HEAD_TAG_RE.search(pending) and len(pending) < PROXY_HEAD_SCAN_BYTES:
+                    continue
+                chunk, pending, head_done = inject_base_tag(pending, final_url), b"", True
+            remember(chunk)
+            yield chunk
+        if not head_done:
+            # Short document that ended before we found <head>
+            chunk = inject_base_tag(pending, final_url)
+            remember(chunk)
+            yield chunk
+        if cache_chunks is not None:
+            proxy_cache[url] = {
+                "status": upstream.status_code,
+                "headers": dict(upstream.headers),
+                "body": b"".join(cache_chunks),
+                "expires": time.time() + ttl,
+            }
+
+    return UpstreamStreamingResponse(upstream, body(), status_code=upstream.status_code, media_type=content_type,
+                                     headers=proxy_response_headers(upstream.headers, "MISS"))
+
 async def download_css(stylesheet_urls, base_url):
     css_contents = []
     async with httpx.AsyncClient() as client:
@@ -964,5 +3151,5 @@ async def download_css(stylesheet_urls, base_url):
     return css_contents
 
 if __name__ == "__main__":
-    import uvicorn # type: ignore
+    import uvicorn  # type: ignore
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,130 @@
+"""Small measurement helpers shared by the API, the browser service, snapshots and benchmarks
+
+Nearest-rank percentiles over latency samples, and resident set size for
+this process and its child processes (the Playwright driver and Chromium).
+"""
+import asyncio
+import contextlib
+import math
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile (0.0 for no values)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (Linux /proc, falling back to ru_maxrss)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+
+    # ru_maxrss is KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def children_rss_mb(pid: Optional[int] = None) -> float:
+    """Summed RSS of every descendant of a process (the Playwright driver and Chromium's processes)
+
+    Linux only (/proc); 0.0 elsewhere. Chromium's processes share some pages,
+    so the sum overstates their real footprint a little, consistently from run
+    to run.
+    """
+    pid = os.getpid() if pid is None else pid
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0.0
+    children: Dict[int, List[int]] = defaultdict(list)
+    rss_pages: Dict[int, int] = {}
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm") as f:
+                rss_pages[int(entry)] = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # exited while we were looking
+        # The command name may contain spaces or parentheses; the fields after the last ")" don't
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children[ppid].append(int(entry))
+
+    total_pages = 0
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        total_pages += rss_pages.get(child, 0)
+        pending.extend(children.get(child, []))
+    return total_pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+
+
+class MemoryWatermark:
+    """Samples RSS in the background while a block runs and records the high-water marks
+
+    RSS is per process, so with concurrent requests the numbers include
+    whatever else the process was doing at the time. With
+    ``include_children`` it also tracks the child processes (Chromium does
+    most of the allocating on big pages) and their sum with this process,
+    each sampled at the same moment; walking /proc takes a few ms with a
+    browser running, so that's for benchmarks rather than every request.
+    """
+
+    def __init__(self, interval: float = 0.05, include_children: bool = False):
+        self.interval = interval
+        self.include_children = include_children
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self.peak_children_mb = 0.0
+        self.peak_total_mb = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self):
+        own = current_rss_mb()
+        children = children_rss_mb() if self.include_children else 0.0
+        self.peak_mb = max(self.peak_mb, own)
+        self.peak_children_mb = max(self.peak_children_mb, children)
+        self.peak_total_mb = max(self.peak_total_mb, own + children)
+
+    async def _run(self):
+        while True:
+            if self.include_children:
+                await asyncio.to_thread(self._sample)  # keep the /proc walk off the event loop
+            else:
+                self._sample()
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self.start_mb = current_rss_mb()
+        self._sample()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        # Let the sampler finish unwinding (it may be mid to_thread) before the final sample
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._sample()
+
+    def report(self) -> Dict[str, float]:
+        self._sample()
+        return {
+            "rss_start_mb": round(self.start_mb, 1),
+            "rss_peak_mb": round(self.peak_mb, 1),
+            "rss_delta_mb": round(self.peak_mb - self.start_mb, 1),
+        }
@@ -0,0 +1,349 @@
+"""Compact on-disk snapshots of scraped pages, and bulk replay of extraction/cloning
+
+A snapshot is the output of ``WebScraper.fetch_page_data`` (HTML, computed
+styles, assets, fonts, media queries, screenshot...) packed with msgpack and
+compressed with zstd. Downloaded stylesheets are stored separately as
+content-addressed blobs, so a framework CSS file shared by many pages (or many
+captures of one page) is kept once.
+
+Usage (from the backend directory):
+
+    python -m snapshots capture https://example.com https://example.org
+    python -m snapshots list
+    python -m snapshots replay --mode clone --model mock --processes 4 --output replay.json
+    python -m snapshots replay --compare replay.json
+
+Replays run in a process pool and never touch the network (with a ``mock``
+model), so they give reproducible inputs for tuning prompts and extraction and
+for performance regression tests. Each result carries a hash of the extracted
+design context (and of the generated HTML) so changed outputs are easy to spot.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import percentile
+
+# Snapshot settings (override from the environment)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshots"))
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "10"))
+SNAPSHOT_REPLAY_PROCESSES = int(os.getenv("SNAPSHOT_REPLAY_PROCESSES", str(os.cpu_count() or 1)))
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SnapshotStore:
+    """Snapshots as ``<id>.snap`` (zstd-compressed msgpack) plus a small ``<id>.json`` index entry
+
+    Stylesheet contents live in ``blobs/<sha256>.zst`` and snapshots refer to
+    them by hash. Snapshot ids are a hash of the packed container.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per write: threads of one process may write the same shared blob at once
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _put_blob(self, data: bytes, compressor) -> Tuple[str, int]:
+        """Store a blob once; returns (sha256, bytes newly written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(os.path.join("blobs", f"{digest}.zst"))
+        if os.path.exists(path):
+            return digest, 0
+        compressed = compressor.compress(data)
+        self._write(path, compressed)
+        return digest, len(compressed)
+
+    def _get_blob(self, digest: str, decompressor) -> bytes:
+        with open(self._path(os.path.join("blobs", f"{digest}.zst")), "rb") as f:
+            return decompressor.decompress(f.read())
+
+    def save(self, page_data: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """Write one fetch_page_data result; returns its index entry"""
+        import msgpack
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL)
+        css_refs = []
+        blob_bytes = 0
+        for css in page_data.get("css_contents", []):
+            digest, written = self._put_blob(css.encode("utf-8"), compressor)
+            css_refs.append(digest)
+            blob_bytes += written
+
+        # The screenshot travels as base64 in page_data; raw bytes are a quarter smaller
+        screenshot = page_data.get("screenshot")
+        container = {
+            "format": SNAPSHOT_FORMAT,
+            "url": url,
+            "captured_at": time.time(),
+            "page_data": {k: v for k, v in page_data.items() if k not in ("css_contents", "screenshot")},
+            "css": css_refs,
+            "screenshot": base64.b64decode(screenshot) if screenshot else None,
+        }
+        packed = msgpack.packb(container, use_bin_type=True)
+        snapshot_id = hashlib.sha256(packed).hexdigest()[:32]
+        data = compressor.compress(packed)
+        self._write(self._path(f"{snapshot_id}.snap"), data)
+
+        entry = {
+            "id": snapshot_id,
+            "url": url,
+            "captured_at": container["captured_at"],
+            "bytes": len(data),
+            "raw_bytes": len(packed),
+            "html_chars": len(page_data.get("html", "")),
+            "stylesheets": len(css_refs),
+            "new_blob_bytes": blob_bytes,
+        }
+        self._write(self._path(f"{snapshot_id}.json"), json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def load(self, snapshot_id: str) -> Dict[str, Any]:
+        """Rebuild the page_data dict exactly as fetch_page_data returned it"""
+        import msgpack
+        import zstandard
+
+        if not SNAPSHOT_ID_RE.match(snapshot_id):
+            raise KeyError(snapshot_id)
+        path = self._path(f"{snapshot_id}.snap")
+        if not os.path.isfile(path):
+            raise KeyError(snapshot_id)
+        decompressor = zstandard.ZstdDecompressor()
+        with open(path, "rb") as f:
+            container = msgpack.unpackb(decompressor.decompress(f.read()), raw=False)
+        if container.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Snapshot {snapshot_id} has unsupported format {container.get('format')}")
+        page_data = dict(container["page_data"])
+        page_data["css_contents"] = [self._get_blob(d, decompressor).decode("utf-8") for d in container["css"]]
+        screenshot = container.get("screenshot")
+        page_data["screenshot"] = base64.b64encode(screenshot).decode("utf-8") if screenshot else None
+        return page_data
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Index entries, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json") and SNAPSHOT_ID_RE.match(name[:-5]):
+                with open(self._path(name)) as f:
+                    entries.append(json.load(f))
+        return sorted(entries, key=lambda entry: entry["captured_at"])
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _init_worker():
+    # Pay for the heavy imports up front so they don't land in the first snapshot's timings
+    import bs4  # noqa: F401
+
+    import main  # noqa: F401
+
+
+async def _clone(main, design_context, task: Dict[str, Any], report: Dict[str, Any]) -> str:
+    try:
+        return await main.LLMCloner.clone_with_reasoning_chain(
+            design_context, task["model"], task["generation_mode"], report
+        )
+    finally:
+        # Each snapshot gets its own event loop, and pooled SDK clients can't outlive theirs
+        await main.llm_providers.aclose()
+
+
+def _replay_one(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point: load one snapshot and re-run extraction (and cloning)"""
+    import main  # imported in the worker, so the parent only pays for it once it needs to
+
+    result: Dict[str, Any] = {"id": task["id"]}
+    try:
+        start = time.perf_counter()
+        page_data = SnapshotStore(task["root"]).load(task["id"])
+        result["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        design_context = main.WebScraper.extract_design_context(page_data["html"], page_data)
+        result["extract_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result.update({
+            "title": design_context.title,
+            "limits_hit": design_context.limits_hit,
+            "context_sha": _digest(design_context.dict()),
+        })
+
+        if task["mode"] == "clone":
+            report: Dict[str, Any] = {}
+            start = time.perf_counter()
+            html = asyncio.run(_clone(main, design_context, task, report))
+            result["clone_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            result["html_chars"] = len(html)
+            result["html_sha"] = _digest(html)
+            result["generation"] = report
+    except Exception as e:
+        result["error"] = repr(e)
+    return result
+
+
+def replay(snapshot_ids: Optional[List[str]] = None, mode: str = "extract", model: str = "mock",
+           generation_mode: str = "single", processes: Optional[int] = None,
+           root: str = SNAPSHOT_DIR) -> Dict[str, Any]:
+    """Re-run extraction (mode "extract") or the whole clone pipeline (mode "clone") over snapshots
+
+    Blocks until every snapshot is done; call it from a thread inside the event loop.
+    """
+    store = SnapshotStore(root)
+    if not snapshot_ids:
+        snapshot_ids = [entry["id"] for entry in store.entries()]
+    tasks = [{"id": snapshot_id, "root": root, "mode": mode, "model": model,
+              "generation_mode": generation_mode} for snapshot_id in snapshot_ids]
+    processes = max(1, min(processes or SNAPSHOT_REPLAY_PROCESSES, len(tasks) or 1))
+
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    if tasks:
+        # spawn, not fork: the API process has an event loop and threads running
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker) as pool:
+            results = list(pool.map(_replay_one, tasks))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    ok = [r for r in results if "error" not in r]
+    summary: Dict[str, Any] = {"snapshots": len(results), "errors": len(results) - len(ok),
+                               "wall_ms": round(wall_ms, 1)}
+    for stage in ("load_ms", "extract_ms", "clone_ms"):
+        values = [r[stage] for r in ok if stage in r]
+        if values:
+            summary[stage] = {"p50": round(percentile(values, 50), 2), "p95": round(percentile(values, 95), 2),
+                              "total": round(sum(values), 1)}
+    return {"mode": mode, "model": model, "generation_mode": generation_mode, "processes": processes,
+            "summary": summary, "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Changed outputs and stage timings beyond ``threshold`` percent, as human-readable lines"""
+    lines = []
+    before = {r["id"]: r for r in baseline.get("results", [])}
+    for result in current.get("results", []):
+        old = before.get(result["id"])
+        if not old or "error" in result or "error" in old:
+            continue
+        for key in ("context_sha", "html_sha"):
+            if key in result and key in old and result[key] != old[key]:
+                lines.append(f"{result['id']} {key} changed")
+    for stage in ("extract_ms", "clone_ms"):
+        old = baseline.get("summary", {}).get(stage, {}).get("p50")
+        new = current.get("summary", {}).get(stage, {}).get("p50")
+        if old and new:
+            change = (new - old) / old * 100.0
+            print(f"  {stage:<12} p50 {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%)")
+            if change > threshold:
+                lines.append(f"{stage} p50 {change:+.1f}%")
+    return lines
+
+
+async def capture(urls: List[str], root: str = SNAPSHOT_DIR) -> List[Dict[str, Any]]:
+    import main
+
+    store = SnapshotStore(root)
+    entries = []
+    try:
+        for url in urls:
+            while True:
+                try:
+                    page_data = await main.WebScraper.scrape(url)
+                    break
+                except main.AdmissionRejected as e:
+                    # Bulk capture waits out the scrape rate limit instead of failing
+                    await asyncio.sleep(int(e.headers["Retry-After"]))
+            entries.append(await asyncio.to_thread(store.save, page_data, url))
+    finally:
+        await main.browser_manager.aclose()
+    return entries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Capture page snapshots and replay extraction/cloning from them")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot directory (default: SNAPSHOT_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture_cmd = commands.add_parser("capture", help="scrape URLs and save snapshots")
+    capture_cmd.add_argument("urls", nargs="+")
+
+    commands.add_parser("list", help="list saved snapshots")
+
+    replay_cmd = commands.add_parser("replay", help="re-run extraction or cloning over snapshots")
+    replay_cmd.add_argument("ids", nargs="*", help="snapshot ids (default: all)")
+    replay_cmd.add_argument("--mode", choices=["extract", "clone"], default="extract")
+    replay_cmd.add_argument("--model", default="mock", help="LLM model for --mode clone (mock = offline)")
+    replay_cmd.add_argument("--generation-mode", choices=["single", "sections"], default="single")
+    replay_cmd.add_argument("--processes", type=int, default=None)
+    replay_cmd.add_argument("--output", help="write the JSON results here")
+    replay_cmd.add_argument("--compare", help="previous replay JSON to diff against")
+    replay_cmd.add_argument("--threshold", type=float, default=10.0, help="timing regression threshold in percent")
+    replay_cmd.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "capture":
+        for entry in asyncio.run(capture(args.urls, args.dir)):
+            print(f"{entry['id']}  {entry['bytes'] / 1024:>8.1f} KiB  {entry['url']}")
+        return 0
+
+    if args.command == "list":
+        for entry in SnapshotStore(args.dir).entries():
+            captured = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["captured_at"]))
+            print(f"{entry['id']}  {captured}  {entry['bytes'] / 1024:>8.1f} KiB  {entry['url']}")
+        return 0
+
+    results = replay(args.ids, args.mode, args.model, args.generation_mode, args.processes, args.dir)
+    summary = results["summary"]
+    print(f"Replayed {summary['snapshots']} snapshots ({args.mode}) on {results['processes']} processes "
+          f"in {summary['wall_ms']}ms, errors {summary['errors']}")
+    for stage in ("load_ms", "extract_ms", "clone_ms"):
+        if stage in summary:
+            print(f"  {stage:<12} p50 {summary[stage]['p50']}ms  p95 {summary[stage]['p95']}ms")
+    for result in results["results"]:
+        if "error" in result:
+            print(f"  {result['id']} failed: {result['error']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare}")
+        changes = compare(results, baseline, args.threshold)
+        for line in changes:
+            print(f"  {line}")
+        if changes and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
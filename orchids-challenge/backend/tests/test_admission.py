@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from main import AdmissionController, AdmissionRejected, TokenBucket
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_up_to_capacity_without_waiting():
+    async def scenario():
+        controller = AdmissionController("test", capacity=2, queue_size=4, max_wait=5)
+        await controller.acquire(0)
+        await controller.acquire(0)
+        assert controller._active == 2
+        assert controller.queue_depth == 0
+        assert not controller.has_free_slot
+
+    run(scenario())
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=8, max_wait=5)
+        await controller.acquire(0)
+        order = []
+
+        async def waiter(name, priority):
+            await controller.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name, priority))
+                 for name, priority in (("clone-1", 1), ("analyze-1", 0), ("clone-2", 1), ("analyze-2", 0))]
+        await asyncio.sleep(0)
+        for _ in tasks:
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["analyze-1", "analyze-2", "clone-1", "clone-2"]
+
+    run(scenario())
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=1, max_wait=5)
+        await controller.acquire(0)
+        waiter = asyncio.create_task(controller.acquire(0))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(0)
+        assert excinfo.value.status_code == 429
+        assert int(excinfo.value.headers["Retry-After"]) >= 1
+        assert controller.rejected == 1
+        waiter.cancel()
+
+    run(scenario())
+
+
+def test_wait_past_max_wait_is_rejected_and_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=4, max_wait=0.01)
+        await controller.acquire(0)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(0)
+        assert controller.timed_out == 1
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller._active == 0
+
+    run(scenario())
+
+
+def test_slot_releases_on_error():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=4, max_wait=5)
+        with pytest.raises(RuntimeError):
+            async with controller.slot(priority=0):
+                raise RuntimeError("boom")
+        assert controller._active == 0
+        assert controller.snapshot()["admitted"] == 1
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=4, max_wait=5)
+        await controller.acquire(0)
+        waiter = asyncio.create_task(controller.acquire(0))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller._active == 0
+
+    run(scenario())
+
+
+def test_grant_then_cancel_passes_the_slot_on():
+    async def scenario():
+        controller = AdmissionController("test", capacity=1, queue_size=4, max_wait=5)
+        await controller.acquire(0)
+        waiter = asyncio.create_task(controller.acquire(0))
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+
+        # Hand the slot to the waiter, then cancel it before it gets to run
+        controller.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller._active == 0
+
+        await asyncio.wait_for(controller.acquire(0), timeout=1)
+        assert controller._active == 1
+
+    run(scenario())
+
+
+def test_token_bucket_allows_a_burst_then_reports_the_wait():
+    bucket = TokenBucket(rate=2, period=60)
+    assert bucket.take() == 0.0
+    assert bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(30.0, rel=0.01)
+
+
+def test_empty_bucket_is_rejected_without_taking_a_slot():
+    async def scenario():
+        controller = AdmissionController("test", capacity=4, queue_size=4, max_wait=5,
+                                         bucket=TokenBucket(rate=1, period=60))
+        await controller.acquire(0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(0)
+        assert excinfo.value.status_code == 429
+        assert 1 <= int(excinfo.value.headers["Retry-After"]) <= 60
+        assert controller._active == 1
+        assert controller.rate_limited == 1
+        assert controller.snapshot()["rate_limited"] == 1
+
+    run(scenario())
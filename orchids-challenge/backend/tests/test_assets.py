@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("bs4")
+
+import main
+from main import AssetStore, WebScraper
+
+
+def test_content_type_wins_over_the_extension():
+    assert AssetStore.classify("https://a.test/logo.png", "text/html; charset=utf-8") is None
+    assert AssetStore.classify("https://a.test/download?id=1", "image/webp") == "image"
+    assert AssetStore.classify("https://a.test/f", "application/font-woff") == "font"
+    assert AssetStore.classify("https://a.test/site.css", "text/css") == "css"
+
+
+def test_extension_and_initiator_count_when_the_type_is_generic():
+    assert AssetStore.classify("https://a.test/logo.PNG") == "image"
+    assert AssetStore.classify("https://a.test/f.woff2", "application/octet-stream") == "font"
+    assert AssetStore.classify("https://a.test/pixel", initiator="img") == "image"
+    assert AssetStore.classify("https://a.test/app.js") is None
+
+
+def test_css_references_become_asset_ids_or_absolute_urls():
+    css = b"""@import "theme.css";
+.hero { background: url('../img/bg.jpg'); }
+.icon { background: url(data:image/png;base64,AAAA); }
+@font-face { src: url("/fonts/a.woff2") format("woff2"); }"""
+    mirrored = {"https://cdn.test/css/theme.css": "1" * 64 + ".css",
+                "https://cdn.test/fonts/a.woff2": "2" * 64 + ".woff2"}
+    out = AssetStore.rewrite_css_references(css, "https://cdn.test/css/site.css", mirrored).decode()
+    assert f'@import "{"1" * 64}.css"' in out
+    assert "url('https://cdn.test/img/bg.jpg')" in out
+    assert "url(data:image/png;base64,AAAA)" in out
+    assert f'url("{"2" * 64}.woff2")' in out
+
+
+def test_collect_urls_resolves_filters_and_dedupes():
+    html = """<html><body><img src="/a.png"><img src="data:image/gif;base64,R0"><img src="/a.png"></body></html>"""
+    context = WebScraper.extract_design_context(html, {
+        "html": html,
+        "stylesheets": ["https://a.test/site.css"],
+        "assets": [{"url": "https://a.test/f.woff2", "type": "font"},
+                   {"url": "https://a.test/app.js", "type": "script"}],
+    })
+    assert AssetStore.collect_urls(context, "https://a.test/page") == {
+        "https://a.test/a.png": "image",
+        "https://a.test/f.woff2": "font",
+        "https://a.test/site.css": "css",
+    }
+
+
+def test_rewrite_html_points_attributes_srcset_and_styles_at_assets():
+    html = ('<img src="a.png" srcset="a.png 1x, b.png 2x">'
+            '<div style="background: url(a.png)"></div><style>.x { background: url("a.png") }</style>'
+            '<a href="other.html">x</a>')
+    out = AssetStore.rewrite_html(html, "https://a.test/", {"https://a.test/a.png": "abc.png"},
+                                  "http://api.test")
+    assert 'src="http://api.test/assets/abc.png"' in out
+    assert 'srcset="http://api.test/assets/abc.png 1x, b.png 2x"' in out
+    assert "url(http://api.test/assets/abc.png)" in out
+    assert 'url("http://api.test/assets/abc.png")' in out
+    assert 'href="other.html"' in out
+
+
+def mock_client(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(main, "get_proxy_client", lambda: client)
+    return client
+
+
+def test_soft_404_at_an_image_url_is_not_mirrored(tmp_path, monkeypatch):
+    mock_client(monkeypatch, lambda request: httpx.Response(
+        200, headers={"content-type": "text/html"}, content=b"<html>Not found</html>"))
+    store = AssetStore(str(tmp_path))
+    assert asyncio.run(store._download("https://a.test/logo.png", "image", asyncio.Semaphore(1))) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_downloads_stay_under_the_store_cap(tmp_path, monkeypatch):
+    mock_client(monkeypatch, lambda request: httpx.Response(
+        200, headers={"content-type": "image/png"}, content=request.url.path.encode() * 10))
+    monkeypatch.setattr(main, "ASSET_STORE_MAX_BYTES", 250)
+    store = AssetStore(str(tmp_path))
+
+    async def scenario():
+        urls = [f"https://a.test/{i}.png" for i in range(6)]  # 60 bytes each
+        return await asyncio.gather(*(store._download(url, "image", asyncio.Semaphore(6)) for url in urls))
+
+    results = asyncio.run(scenario())
+    assert sum(1 for r in results if r) == 4
+    assert sum(path.stat().st_size for path in tmp_path.iterdir()) == store._total_bytes == 240
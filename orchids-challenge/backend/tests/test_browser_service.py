@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import browser_service
+from browser_service import BrowserPool, ChromiumProcess
+
+
+class FakeProcess:
+    def __init__(self):
+        self.returncode = None
+        self.pid = 1234
+
+
+@pytest.fixture
+def fake_chromium(monkeypatch):
+    """ChromiumProcess without a real browser: start/stop flip state, health is always fine"""
+    started = []
+
+    async def start(self, executable, client):
+        self.process = FakeProcess()
+        self.ready = True
+        started.append(self.index)
+
+    async def stop(self):
+        self.ready = False
+        self.process = None
+
+    async def responding(self, client):
+        return self.process is not None and self.process.returncode is None
+
+    monkeypatch.setattr(ChromiumProcess, "start", start)
+    monkeypatch.setattr(ChromiumProcess, "stop", stop)
+    monkeypatch.setattr(ChromiumProcess, "responding", responding)
+    return started
+
+
+async def started_pool(count=1, per_browser=1):
+    pool = BrowserPool(count, per_browser)
+    for browser in pool.browsers:
+        await browser.start("chromium", None)
+    return pool
+
+
+def test_default_switches_include_no_sandbox_unless_enabled():
+    browser = ChromiumProcess(0, 9500)
+    browser.user_data_dir = "/tmp/profile"
+    args = browser.args()
+    assert "--no-sandbox" in args
+    assert "--headless" in args and "--disable-background-timer-throttling" in args
+    assert args[-4:] == ["--remote-debugging-port=9500", "--remote-debugging-address=127.0.0.1",
+                         "--user-data-dir=/tmp/profile", "about:blank"]
+    assert "--no-sandbox" not in browser.args(sandbox=True)
+
+
+@pytest.mark.asyncio
+async def test_waiting_leases_are_granted_round_robin_across_workers(fake_chromium):
+    pool = await started_pool()
+    granted = [await pool.acquire("busy", max_wait=5)]
+
+    async def lease(worker):
+        granted.append(await pool.acquire(worker, max_wait=5))
+
+    tasks = [asyncio.create_task(lease(worker)) for worker in ("busy", "busy", "busy", "quiet")]
+    await asyncio.sleep(0)
+    assert pool.snapshot()["waiting_by_worker"] == {"busy": 3, "quiet": 1}
+    for expected in range(2, len(tasks) + 2):
+        pool.release(granted[-1]["id"])
+        while len(granted) < expected:
+            await asyncio.sleep(0)
+    order = [lease["worker"] for lease in granted[1:]]
+    assert order == ["busy", "quiet", "busy", "busy"]
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reclaimed_and_handed_to_waiters(fake_chromium):
+    pool = await started_pool()
+    stale = await pool.acquire("forgetful", max_wait=5)
+    waiter = asyncio.create_task(pool.acquire("patient", max_wait=5))
+    await asyncio.sleep(0)
+    pool.leases[stale["id"]]["expires_at"] = 0
+    await pool.check()
+    lease = await waiter
+    assert stale["id"] not in pool.leases
+    assert lease["worker"] == "patient"
+    assert pool.reclaimed == 1
+
+
+@pytest.mark.asyncio
+async def test_crashed_browser_is_restarted_and_its_leases_dropped(fake_chromium):
+    pool = await started_pool(count=2)
+    lease = await pool.acquire("worker", max_wait=5)
+    crashed = pool.browsers[lease["browser"]]
+    crashed.process.returncode = -9
+    await pool.check()
+    assert crashed.alive
+    assert crashed.restarts == 1
+    assert lease["id"] not in pool.leases and not crashed.leases
+    assert fake_chromium.count(crashed.index) == 2
+    assert pool.capacity == 2
@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from starlette.requests import Request
+
+import main
+from main import CachedResponse
+
+
+def make_request(method="GET", **headers):
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.fixture
+def cached():
+    return CachedResponse.build({"status": "success", "html": "<p>clone</p>" * 500, "title": "Café"})
+
+
+def test_body_is_compact_json(cached):
+    assert json.loads(cached.body)["title"] == "Café"
+    assert b": " not in cached.body
+
+
+def test_plain_response_carries_etag_and_result_location(cached):
+    response = cached.respond(make_request())
+    assert response.status_code == 200
+    assert response.body == cached.body
+    assert response.headers["etag"] == cached.etag == f'"{cached.result_id}"'
+    assert response.headers["content-location"] == f"/results/{cached.result_id}"
+    assert "content-encoding" not in response.headers
+
+
+def test_gzip_variant_when_accepted(cached):
+    response = cached.respond(make_request(accept_encoding="gzip, deflate"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == cached.body
+    assert response.headers["etag"] == f'"{cached.result_id}-gzip"' != cached.etag
+
+
+def test_refused_encoding_is_not_used(cached):
+    response = cached.respond(make_request(accept_encoding="gzip;q=0, identity"))
+    assert "content-encoding" not in response.headers
+    assert response.body == cached.body
+
+
+def test_small_bodies_are_not_compressed():
+    assert CachedResponse.build({"ok": True}).variants == {}
+
+
+def test_matching_etag_on_conditional_get_is_304(cached):
+    response = cached.respond(make_request(if_none_match=f'W/{cached.etag}, "other"'), conditional=True)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == cached.etag
+
+
+def test_stale_etag_gets_the_body(cached):
+    response = cached.respond(make_request(if_none_match='"stale"'), conditional=True)
+    assert response.status_code == 200
+    assert response.body == cached.body
+
+
+def test_post_never_answers_304(cached):
+    response = cached.respond(make_request("POST", if_none_match=cached.etag))
+    assert response.status_code == 200
+
+
+def test_etag_of_another_encoding_does_not_match(cached):
+    gzip_etag = cached.etag_for("gzip")
+    response = cached.respond(make_request(if_none_match=gzip_etag), conditional=True)
+    assert response.status_code == 200
+    assert response.body == cached.body
+    response = cached.respond(make_request(if_none_match=gzip_etag, accept_encoding="gzip"), conditional=True)
+    assert response.status_code == 304
+    assert response.headers["etag"] == gzip_etag
+
+
+def test_persisted_cache_round_trip(cached, tmp_path):
+    path = str(tmp_path / "cache.json")
+    main.cache.clear()
+    main.cache_response("clone:key", cached)
+    assert main.save_persisted_cache(path, main.persisted_cache_entries()) == 1
+    main.cache.clear()
+    assert asyncio.run(main.restore_persisted_cache(path)) == 1
+    assert main.cache["clone:key"].body == cached.body
+    assert main.cached_results[cached.result_id].etag == cached.etag
+    main.cache.clear()
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("bs4")
+
+import main
+from main import WebScraper
+
+
+def test_cap_items_keeps_the_limit_and_records_the_cut(monkeypatch):
+    monkeypatch.setattr(main, "MAX_COLLECTED_ITEMS", 3)
+    limits_hit = []
+    assert WebScraper._cap_items([1, 2, 3], "assets", limits_hit) == [1, 2, 3]
+    assert limits_hit == []
+    # Collectors return one extra item when they had more to give
+    assert WebScraper._cap_items([1, 2, 3, 4], "assets", limits_hit) == [1, 2, 3]
+    assert limits_hit == ["assets"]
+
+
+def test_oversized_html_is_truncated_before_parsing(monkeypatch):
+    monkeypatch.setattr(main, "MAX_HTML_CHARS", 200)
+    html = "<html><head><title>Big</title></head><body>" + "<p>filler text</p>" * 100 + "</body></html>"
+    context = WebScraper.extract_design_context(html, {"html": html, "limits_hit": ["dom_nodes"]})
+    assert context.title == "Big"
+    assert len(context.full_html) == 200
+    assert context.limits_hit == ["dom_nodes", "html_chars"]
+
+
+def test_html_under_the_cap_is_untouched():
+    html = "<html><body><p>small</p></body></html>"
+    context = WebScraper.extract_design_context(html, {"html": html})
+    assert context.full_html == html
+    assert context.limits_hit == []
+
+
+def test_dom_walks_stop_at_the_node_cap(monkeypatch):
+    monkeypatch.setattr(main, "MAX_DOM_NODES", 5)
+    html = "<html><body>" + "".join(f"<section><img src='/{i}.png'></section>" for i in range(20)) + "</body></html>"
+    context = WebScraper.extract_design_context(html, {"html": html})
+    assert len(context.images) == 5
+    assert all(block["children_count"] <= 5 for block in context.layout_info["sections"])
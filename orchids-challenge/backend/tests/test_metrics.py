@@ -0,0 +1,24 @@
+import asyncio
+
+from metrics import MemoryWatermark, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) == 0.0
+
+
+def test_watermark_sampler_is_stopped_on_exit():
+    async def scenario():
+        async with MemoryWatermark(interval=0.001) as memory:
+            await asyncio.sleep(0.01)
+        assert memory._task.done()
+        report = memory.report()
+        assert report["rss_peak_mb"] >= report["rss_start_mb"] > 0
+        # Nothing left running for the loop to cancel at shutdown
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(scenario())
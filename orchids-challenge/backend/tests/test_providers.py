@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from main import LLMProvider, MockProvider
+
+
+class FlakyProvider(MockProvider):
+    """Raises the queued errors one call at a time, then answers normally"""
+
+    def __init__(self, errors, max_concurrency=4):
+        super().__init__(max_concurrency)
+        self.errors = list(errors)
+
+    async def _generate(self, model, system_message, prompt, temperature, max_tokens, task_type):
+        self.calls.append({"model": model, "task_type": task_type, "prompt_chars": len(prompt)})
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.RESPONSES.get(task_type, "ok")
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = httpx.Response(status_code, headers={"retry-after": retry_after} if retry_after else {})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Backoff sleeps are recorded instead of waited out
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(main.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(main, "LLM_MAX_RETRIES", 3)
+    return delays
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (StatusError(429, "7"), (True, 7.0)),
+    (StatusError(503), (True, None)),
+    (StatusError(400), (False, None)),
+    (StatusError(401), (False, None)),
+    (asyncio.TimeoutError(), (True, None)),
+    (httpx.ConnectError("refused"), (True, None)),
+    (type("APIConnectionError", (Exception,), {})(), (True, None)),
+    (ValueError("bad prompt"), (False, None)),
+])
+def test_classify_error(exc, expected):
+    assert LLMProvider._classify_error(exc) == expected
+
+
+@pytest.mark.asyncio
+async def test_retryable_errors_are_retried_until_success(no_backoff):
+    provider = FlakyProvider([StatusError(503), httpx.ReadTimeout("slow")])
+    assert await provider.generate("mock", "sys", "prompt", task_type="head") == MockProvider.RESPONSES["head"]
+    assert len(provider.calls) == 3
+    assert len(no_backoff) == 2
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_are_raised_without_retrying(no_backoff):
+    provider = FlakyProvider([StatusError(400)])
+    with pytest.raises(StatusError):
+        await provider.generate("mock", "sys", "prompt")
+    assert len(provider.calls) == 1
+    assert no_backoff == []
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_the_attempt_limit(no_backoff):
+    provider = FlakyProvider([StatusError(502)] * 10)
+    with pytest.raises(StatusError):
+        await provider.generate("mock", "sys", "prompt")
+    assert len(provider.calls) == main.LLM_MAX_RETRIES + 1
+    assert len(no_backoff) == main.LLM_MAX_RETRIES
+
+
+@pytest.mark.asyncio
+async def test_backoff_is_capped_and_honours_retry_after(no_backoff, monkeypatch):
+    monkeypatch.setattr(main, "LLM_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(main, "LLM_BACKOFF_MAX", 5.0)
+    provider = FlakyProvider([StatusError(429, "4"), StatusError(429, "60"), StatusError(500)])
+    await provider.generate("mock", "sys", "prompt")
+    assert no_backoff[0] >= 4.0
+    assert no_backoff[1] == 5.0  # Retry-After beyond the cap is clamped
+    assert 0.0 <= no_backoff[2] <= 4.0  # full jitter over base * 2**attempt
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_provider(monkeypatch):
+    monkeypatch.undo()  # the real asyncio.sleep, so calls overlap
+    running = peak = 0
+
+    class SlowProvider(MockProvider):
+        async def _generate(self, *args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+    provider = SlowProvider(max_concurrency=3)
+    results = await asyncio.gather(*(provider.generate("mock", "sys", "prompt") for _ in range(10)))
+    assert results == ["ok"] * 10
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_sdk_is_imported_off_the_event_loop(monkeypatch):
+    imported = []
+
+    class FakeOpenAI:
+        def AsyncOpenAI(self, **kwargs):
+            return kwargs
+
+    async def fake_to_thread(func, *args):
+        imported.append(args)
+        return FakeOpenAI()
+
+    monkeypatch.setattr(main.asyncio, "to_thread", fake_to_thread)
+    provider = main.OpenAIProvider(max_concurrency=2)
+    client = await provider._get_client()
+    assert imported == [("openai",)]
+    assert client["max_retries"] == 0
+    assert await provider._get_client() is client
+    await client["http_client"].aclose()
@@ -0,0 +1,70 @@
+import time
+from email.utils import formatdate
+
+import httpx
+
+from main import PROXY_CACHE_MAX_TTL, inject_base_tag, proxy_cache_ttl
+
+
+def headers(**values):
+    return httpx.Headers({name.replace("_", "-"): value for name, value in values.items()})
+
+
+def test_max_age_and_s_maxage():
+    assert proxy_cache_ttl(headers(cache_control="public, max-age=60")) == 60
+    assert proxy_cache_ttl(headers(cache_control="max-age=60, s-maxage=30")) == 30
+
+
+def test_ttl_is_capped():
+    assert proxy_cache_ttl(headers(cache_control=f"max-age={PROXY_CACHE_MAX_TTL * 10}")) == PROXY_CACHE_MAX_TTL
+
+
+def test_uncacheable_responses():
+    assert proxy_cache_ttl(headers()) == 0
+    assert proxy_cache_ttl(headers(cache_control="no-store, max-age=60")) == 0
+    assert proxy_cache_ttl(headers(cache_control="private, max-age=60")) == 0
+    assert proxy_cache_ttl(headers(cache_control="max-age=60", set_cookie="a=b")) == 0
+    assert proxy_cache_ttl(headers(cache_control="max-age=60", vary="*")) == 0
+    assert proxy_cache_ttl(headers(cache_control="max-age=soon")) == 0
+
+
+def test_expires_header():
+    ttl = proxy_cache_ttl(headers(expires=formatdate(time.time() + 120, usegmt=True)))
+    assert 100 < ttl <= 120
+    assert proxy_cache_ttl(headers(expires=formatdate(time.time() - 120, usegmt=True))) == 0
+    assert proxy_cache_ttl(headers(expires="not a date")) == 0
+
+
+def test_base_tag_goes_right_after_head():
+    html = b'<!DOCTYPE html><html><HEAD class="x"><title>t</title></HEAD></html>'
+    assert inject_base_tag(html, "https://example.com/a/") == (
+        b'<!DOCTYPE html><html><HEAD class="x"><base href="https://example.com/a/"><title>t</title></HEAD></html>'
+    )
+
+
+def test_base_tag_is_escaped_and_prepended_to_bare_fragments():
+    assert inject_base_tag(b"<p>hi</p>", 'https://example.com/?a=1&b="2"') == (
+        b'<base href="https://example.com/?a=1&amp;b=&quot;2&quot;"><p>hi</p>'
+    )
+
+
+def test_base_tag_without_head_follows_the_doctype_and_html_tag():
+    base = b'<base href="https://example.com/">'
+    assert inject_base_tag(b'<!doctype html>\n<html lang="en"><p>hi</p>', "https://example.com/") == (
+        b'<!doctype html>\n<html lang="en">' + base + b"<p>hi</p>"
+    )
+    assert inject_base_tag(b"<!DOCTYPE html><p>hi</p>", "https://example.com/") == (
+        b"<!DOCTYPE html>" + base + b"<p>hi</p>"
+    )
+
+
+def test_base_tag_after_self_closing_head():
+    html = b"<html><head/><header>x</header></html>"
+    assert inject_base_tag(html, "https://example.com/") == (
+        b'<html><head/><base href="https://example.com/"><header>x</header></html>'
+    )
+
+
+def test_existing_base_tag_is_kept():
+    html = b'<html><head><base href="/root/"></head></html>'
+    assert inject_base_tag(html, "https://example.com/") == html
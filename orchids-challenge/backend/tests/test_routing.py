@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import main
+from main import AdmissionController, LLMProviderRegistry, ModelRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(main, "ROUTING_DEFAULT_HEDGE_AFTER", 0.02)
+    # Providers hold loop-bound state; each test gets its own
+    monkeypatch.setattr(main, "llm_providers", LLMProviderRegistry())
+    main.llm_providers.get("mock").latency_ms = 200
+    return ModelRouter()
+
+
+def generate(router, monkeypatch, capacity):
+    admission = AdmissionController("LLM", capacity)
+    monkeypatch.setattr(main, "llm_admission", admission)
+    peak = 0
+
+    async def scenario():
+        nonlocal peak
+        routing = {"enabled": True, "decisions": []}
+        main.routing_context.set(routing)
+        call = asyncio.create_task(router.generate("mock", "html", "system", "prompt"))
+        while not call.done():
+            peak = max(peak, admission._active)
+            await asyncio.sleep(0.005)
+        return await call, routing["decisions"][0]
+
+    result, decision = asyncio.run(scenario())
+    assert admission._active == 0
+    return result, decision, peak
+
+
+def test_slow_call_is_hedged_when_a_slot_is_free(router, monkeypatch):
+    result, decision, peak = generate(router, monkeypatch, capacity=2)
+    assert decision["hedged"] and decision["fallback"] == "mock-backup"
+    assert decision["winner"] == "mock"
+    assert "Mock clone" in result
+    assert peak == 2
+    # The losing hedge still counts as a call
+    assert router.snapshot()["mock-backup"]["html"]["calls"] == 1
+
+
+def test_hedge_is_skipped_without_a_free_slot(router, monkeypatch):
+    _, decision, peak = generate(router, monkeypatch, capacity=1)
+    assert not decision["hedged"] and decision["hedge_skipped"]
+    assert peak == 1
+    assert "mock-backup" not in router.snapshot()
+
+
+def test_failed_primary_fails_over(router, monkeypatch):
+    original = main.MockProvider._generate
+
+    async def flaky(self, model, *args, **kwargs):
+        if model == "mock":
+            raise RuntimeError("provider down")
+        return await original(self, model, *args, **kwargs)
+
+    monkeypatch.setattr(main.MockProvider, "_generate", flaky)
+    monkeypatch.setattr(main, "LLM_MAX_RETRIES", 0)
+    _, decision, _ = generate(router, monkeypatch, capacity=2)
+    assert decision["failover"] and decision["winner"] == "mock-backup"
+    assert router.snapshot()["mock"]["html"]["error_rate"] == 1.0
+
+
+def test_hedge_delay_is_tracked_per_task_type(router, monkeypatch):
+    monkeypatch.setattr(main, "ROUTING_MIN_SAMPLES", 3)
+    for _ in range(3):
+        router.stats["mock", "style"].record(0.5, ok=True)
+        router.stats["mock", "html"].record(8.0, ok=True)
+    assert router.hedge_delay("mock", "style") == 0.5
+    assert router.hedge_delay("mock", "html") == 8.0
+    assert router.hedge_delay("mock", "section") == main.ROUTING_DEFAULT_HEDGE_AFTER
@@ -0,0 +1,73 @@
+import asyncio
+import io
+import os
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image
+
+import main
+from main import ScreenshotTileStore
+
+
+class FakePage:
+    """Renders each requested clip as a solid image; optionally fails some tiles"""
+
+    def __init__(self, fail_at=()):
+        self.clips = []
+        self.fail_at = set(fail_at)
+
+    async def screenshot(self, type, full_page, clip, quality=None):
+        self.clips.append(clip)
+        if clip["y"] in self.fail_at:
+            raise RuntimeError("tile too large")
+        buffer = io.BytesIO()
+        Image.new("RGB", (clip["width"], clip["height"]), "red").save(buffer, "PNG" if type == "png" else "JPEG")
+        return buffer.getvalue()
+
+
+def test_page_is_captured_as_clipped_tiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "SCREENSHOT_MAX_HEIGHT", 250)
+    store = ScreenshotTileStore(str(tmp_path))
+    page = FakePage()
+    manifest, preview = asyncio.run(store.capture(page, page_height=400, width=64, tile_height=100))
+
+    assert [(c["y"], c["height"]) for c in page.clips] == [(0, 100), (100, 100), (200, 50)]
+    assert [t["name"] for t in manifest["tiles"]] == ["0.jpg", "1.jpg", "2.jpg"]
+    assert manifest["height"] == 250 and manifest["page_height"] == 400
+    for tile in manifest["tiles"]:
+        assert store.path_for(manifest["id"], tile["name"]) is not None
+    assert store.manifest(manifest["id"]) == manifest
+    with Image.open(io.BytesIO(preview)) as img:
+        assert img.size == (64, 250)
+
+
+def test_failed_tiles_are_skipped(tmp_path):
+    store = ScreenshotTileStore(str(tmp_path))
+    manifest, _ = asyncio.run(store.capture(FakePage(fail_at={100}), page_height=300, width=32, tile_height=100))
+    assert [t["index"] for t in manifest["tiles"]] == [0, 2]
+    assert manifest["failed_tiles"] == [1]
+
+
+def test_expired_tile_sets_are_removed(tmp_path):
+    store = ScreenshotTileStore(str(tmp_path))
+    old, fresh = tmp_path / uuid.uuid4().hex, tmp_path / uuid.uuid4().hex
+    for directory in (old, fresh):
+        (directory / "nested").mkdir(parents=True)
+        (directory / "0.jpg").write_bytes(b"x")
+    stale = time.time() - main.SCREENSHOT_TTL - 60
+    os.utime(old, (stale, stale))
+    new = tmp_path / uuid.uuid4().hex
+    store._prepare(str(new))
+    assert not old.exists()
+    assert fresh.exists() and new.is_dir()
+
+
+def test_prepare_tolerates_a_missing_store(tmp_path):
+    root = tmp_path / "not-there-yet"
+    directory = root / uuid.uuid4().hex
+    ScreenshotTileStore(str(root))._prepare(str(directory))
+    assert directory.is_dir()
@@ -0,0 +1,150 @@
+import asyncio
+import re
+
+import pytest
+
+pytest.importorskip("bs4")
+
+import main
+from main import LLMCloner, WebScraper
+
+PAGE = """<html><head><title>Landing</title></head><body>
+<header class="top"><nav>Menu</nav></header>
+<main><section id="hero"><h1>Welcome</h1></section><section id="features"><p>Fast</p></section></main>
+<footer>Contact</footer>
+</body></html>"""
+
+
+def design_context(html):
+    return WebScraper.extract_design_context(html, {"html": html})
+
+
+def test_landmarks_become_units_and_main_is_split():
+    units = LLMCloner._plan_sections(design_context(PAGE))
+    assert [(u["tag"], u["id"], u["in_main"]) for u in units] == [
+        ("header", "", False),
+        ("section", "hero", True),
+        ("section", "features", True),
+        ("footer", "", False),
+    ]
+
+
+def test_non_landmark_blocks_are_planned_through_wrappers():
+    html = """<html><body><div id="root"><div class="app">
+<header>Logo</header>
+<div class="hero"><h1>Build faster</h1></div>
+<div class="intro"><p>Why us</p></div>
+<section><nav>Nested</nav><p>Features</p></section>
+<div id="pricing"><h2>Plans</h2></div>
+<div id="portal"></div>
+Stray words
+<footer>Contact</footer>
+</div></div></body></html>"""
+    context = design_context(html)
+    units = LLMCloner._plan_sections(context)
+    assert [(u["tag"], u["class"] or u["id"]) for u in units] == [
+        ("header", ""), ("div", "hero"), ("div", "intro"), ("section", ""), ("div", "pricing"), ("footer", ""),
+    ]
+    assert units[1]["headings"] == ["Build faster"]
+    assert not any(u["in_main"] for u in units)  # the nested <nav> stays inside its section
+    assert context.layout_info["unplanned"] == [{"tag": "#text", "parent": "", "text": "Stray words"}]
+
+
+def test_contexts_without_layout_sections_fall_back_to_dom_children():
+    context = design_context("<html><body><div class='a'>x</div><div id='b'>y</div></body></html>")
+    context.layout_info = {}
+    units = LLMCloner._plan_sections(context)
+    assert [(u["tag"], u["id"]) for u in units] == [("div", ""), ("div", "b")]
+    assert all(not u["in_main"] and "dom" in u for u in units)
+
+
+def test_block_text_stops_at_the_limit():
+    context = design_context("<html><body><section>" + "<p>word</p>" * 500 + "</section></body></html>")
+    text = context.layout_info["sections"][0]["text"]
+    assert len(text) == WebScraper.BLOCK_TEXT_CHARS
+    assert text.startswith("word word")
+
+
+def test_full_document_replies_are_unwrapped():
+    reply = "```html\n<html><head><title>x</title></head><body><section>s</section></body></html>\n```"
+    assert LLMCloner._validate_fragment(reply, "body") == "<section>s</section>"
+    assert LLMCloner._validate_fragment(reply, "head") == "<title>x</title>"
+    assert LLMCloner._validate_fragment("Sorry, I can't help with that.", "body") is None
+
+
+def test_fallback_section_keeps_identity_and_text():
+    html = LLMCloner._fallback_section({"tag": "div", "id": "pricing", "class": "", "headings": ["Plans"],
+                                        "text": "Cheap"})
+    assert html == '<section id="pricing"><h2>Plans</h2><p>Cheap</p></section>'
+
+
+def test_sections_are_stitched_in_document_order(monkeypatch):
+    main.section_cache.clear()
+    replies = ["<header>H</header>", "<section>hero</section>",
+               "```html\n<section>features</section>\n```", "no markup here"]
+
+    async def fake_call(prompt, model, task_type, max_tokens=None):
+        if task_type == "head":
+            return "<style>body { margin: 0; }</style>"
+        if task_type == "section":
+            block = int(re.search(r"block (\d+) of", prompt).group(1))
+            return replies[block - 1]
+        return f"{task_type} notes"
+
+    monkeypatch.setattr(LLMCloner, "_call_llm", staticmethod(fake_call))
+    report = {}
+    html = asyncio.run(LLMCloner.clone_with_reasoning_chain(design_context(PAGE), "mock", "sections", report))
+
+    body = html[html.index("<body>"):]
+    markers = ("<header>H</header>", "<main>", "hero", "features", "</main>", "<footer>")
+    positions = [body.index(marker) for marker in markers]
+    assert positions == sorted(positions)
+    assert "<style>body { margin: 0; }</style>" in html
+    assert report["sections"] == 4
+    assert report["section_fallbacks"] == 1  # the footer reply had no markup, so it was rebuilt
+    assert "Contact" in body
+
+
+def test_dropped_units_are_reported_as_unplanned(monkeypatch):
+    main.section_cache.clear()
+
+    async def fake_call(prompt, model, task_type, max_tokens=None):
+        return "<section>ok</section>" if task_type in ("head", "section") else "notes"
+
+    monkeypatch.setattr(LLMCloner, "_call_llm", staticmethod(fake_call))
+    monkeypatch.setattr(main, "SECTION_MAX_UNITS", 3)
+    html = "<html><body>" + "".join(f"<div id='b{i}'>block {i}</div>" for i in range(5)) + "</body></html>"
+    report = {}
+    asyncio.run(LLMCloner._generate_by_sections(design_context(html), {
+        "title": "t", "description": "", "color_palette": [], "typography": {}, "css_contents": [],
+    }, "", "", "mock", report))
+    plan = report["section_plan"]
+    assert [u["id"] for u in plan["units"]] == ["b0", "b1", "b4"]
+    assert [u["id"] for u in plan["unplanned"]] == ["b2", "b3"]
+
+
+def test_a_failing_part_cancels_the_others(monkeypatch):
+    main.section_cache.clear()
+    cancelled = []
+
+    async def fake_call(prompt, model, task_type, max_tokens=None):
+        if task_type == "head":
+            await asyncio.sleep(0)
+            raise main.AdmissionRejected("llm", 1)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(task_type)
+            raise
+        return "<section>late</section>"
+
+    async def scenario():
+        with pytest.raises(main.AdmissionRejected):
+            await LLMCloner._generate_by_sections(design_context(PAGE), {
+                "title": "t", "description": "", "color_palette": [], "typography": {}, "css_contents": [],
+            }, "", "", "mock", {})
+        # Already unwound by the time the error reaches the caller, not at loop shutdown
+        assert cancelled == ["section"] * 4
+
+    monkeypatch.setattr(LLMCloner, "_call_llm", staticmethod(fake_call))
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import base64
+import os
+
+import pytest
+
+pytest.importorskip("msgpack")
+pytest.importorskip("zstandard")
+
+from snapshots import SnapshotStore
+
+SHARED_CSS = "body { margin: 0; }\n" * 500
+
+
+def page_data(title, extra_css="h1 { color: red; }"):
+    return {
+        "html": f"<html><head><title>{title}</title></head><body><h1>{title}</h1></body></html>",
+        "css_contents": [SHARED_CSS, extra_css],
+        "screenshot": base64.b64encode(b"\x89PNG fake " + title.encode()).decode(),
+        "computed_styles": {"h1": {"color": "rgb(255, 0, 0)"}},
+        "media_queries": ["(max-width: 600px)"],
+    }
+
+
+def test_round_trip_restores_page_data(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    original = page_data("Home")
+    entry = store.save(original, "https://example.com/")
+    assert entry["url"] == "https://example.com/"
+    assert entry["stylesheets"] == 2
+    assert store.load(entry["id"]) == original
+
+
+def test_missing_screenshot_round_trips(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    original = {**page_data("Home"), "screenshot": None}
+    assert store.load(store.save(original, "https://example.com/")["id"]) == original
+
+
+def test_shared_stylesheets_are_stored_once(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first = store.save(page_data("One"), "https://example.com/one")
+    second = store.save(page_data("Two", extra_css="h2 {}"), "https://example.com/two")
+    assert first["new_blob_bytes"] > 0
+    assert len(os.listdir(tmp_path / "blobs")) == 3
+    # Only the page-specific sheet was new the second time
+    assert 0 < second["new_blob_bytes"] < first["new_blob_bytes"]
+
+
+def test_entries_are_listed_oldest_first(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    ids = [store.save(page_data(title), f"https://example.com/{title}")["id"] for title in ("a", "b", "c")]
+    assert [entry["id"] for entry in store.entries()] == ids
+    assert SnapshotStore(str(tmp_path / "missing")).entries() == []
+
+
+def test_unknown_or_malformed_ids_raise_key_error(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        store.load("0" * 32)
+    with pytest.raises(KeyError):
+        store.load("../../etc/passwd")